@@ -0,0 +1,77 @@
+# Run from the repository root: python -m benchmarks.frame_renderer_benchmark
+# The map tiles are downloaded (or read from the offline tile store) during the warm-up frames.
+import time
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from map_tools.route import Route
+from map_tools.plotting import get_frame_extent
+from map_tools.movie import get_frame_route
+from map_tools.movie_frame import plot_frame, FrameRenderer
+from map_tools.config import get_yaml_config
+
+cfg = get_yaml_config()
+
+route_file = "route_files/Super_Mario_Ebersberg.gpx"
+dpi = 100
+warmup_frames = 10
+nframes = 60
+
+
+class CanvasSink(object):
+    # renders the frames like the ffmpeg writer, without encoding them
+    def __init__(self, fig: plt.Figure) -> None:
+        self.fig = fig
+
+    def write_frame(self, frame) -> None:
+        pass
+
+    def grab_frame(self) -> None:
+        self.fig.canvas.draw()
+
+
+def get_extents(frame_route: Route, frames: range, dynamic: bool) -> list:
+    if not dynamic:
+        return [get_frame_extent(frame_route)] * len(frames)
+    return [get_frame_extent(frame_route.prefix(i), fixed_size=0.1, center_on="last") for i in frames]
+
+
+def time_plot_frame(frame_route: Route, frames: range, dynamic: bool) -> float:
+    fig = plt.figure(dpi=dpi)
+    sink = CanvasSink(fig)
+    extents = get_extents(frame_route, frames, dynamic)
+    t0 = time.perf_counter()
+    for i, extent in zip(frames, extents):
+        if i == frames[warmup_frames]:
+            t0 = time.perf_counter()
+        plot_frame(frame_route.prefix(i), sink, extent=extent)
+    plt.close(fig)
+    return 1e3 * (time.perf_counter() - t0) / (len(frames) - warmup_frames)
+
+
+def time_frame_renderer(frame_route: Route, frames: range, dynamic: bool) -> float:
+    fig = plt.figure(dpi=dpi)
+    sink = CanvasSink(fig)
+    extents = get_extents(frame_route, frames, dynamic)
+    renderer = FrameRenderer(fig, [frame_route], dpi, static_extent=None if dynamic else extents[0])
+    t0 = time.perf_counter()
+    for i, extent in zip(frames, extents):
+        if i == frames[warmup_frames]:
+            t0 = time.perf_counter()
+        renderer.update([frame_route.prefix(i)], extent)
+        renderer.grab_frame(sink)
+    plt.close(fig)
+    return 1e3 * (time.perf_counter() - t0) / (len(frames) - warmup_frames)
+
+
+if __name__ == "__main__":
+    frame_route, advancing = get_frame_route(Route(route_file), 150.)
+    frames = range(len(frame_route) // 2, len(frame_route) // 2 + warmup_frames + nframes)
+    print("%s, %i frames at %i dpi" % (route_file, nframes, dpi))
+    print("%-12s %18s %22s" % ("map", "plot_frame [ms]", "FrameRenderer [ms]"))
+    for dynamic in [False, True]:
+        print("%-12s %18.1f %22.1f" % (
+            "dynamic" if dynamic else "static",
+            time_plot_frame(frame_route, frames, dynamic),
+            time_frame_renderer(frame_route, frames, dynamic),
+        ))
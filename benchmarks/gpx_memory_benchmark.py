@@ -0,0 +1,58 @@
+# Run from the repository root: python -m benchmarks.gpx_memory_benchmark [repetitions]
+# Builds a large synthetic track by repeating the points of Munich_Budapest.gpx and measures the
+# peak resident memory of each parser in a fresh interpreter.
+import sys
+import gzip
+import time
+import resource
+import subprocess
+import tempfile
+from pathlib import Path
+
+source_file = "route_files/Munich_Budapest.gpx"
+
+
+def write_large_gpx(file: Path, repetitions: int) -> None:
+    content = Path(source_file).read_bytes()
+    start = content.index(b"<trkseg>") + len(b"<trkseg>")
+    end = content.index(b"</trkseg>")
+    opener = gzip.open if file.suffix == ".gz" else open
+    with opener(file, "wb") as f:
+        f.write(content[:start])
+        for _ in range(repetitions):
+            f.write(content[start:end])
+        f.write(content[end:])
+
+
+def measure(parser: str, file: str) -> None:
+    if parser == "legacy":
+        from .legacy_gpx import read_gpx_legacy as read
+    else:
+        from map_tools.gpx import read_gpx_file as read
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    route_array, _ = read(file)
+    elapsed = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print("%i %.1f %.2f" % (len(route_array), (peak - baseline) / 1024., elapsed))
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--measure"]:
+        measure(sys.argv[2], sys.argv[3])
+        sys.exit()
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    with tempfile.TemporaryDirectory() as directory:
+        files = [Path(directory) / "large.gpx", Path(directory) / "large.gpx.gz"]
+        for file in files:
+            write_large_gpx(file, repetitions)
+        print("%-15s %-10s %10s %10s %16s %10s"
+              % ("file", "parser", "size [MB]", "points", "peak RSS [MB]", "time [s]"))
+        for file, parser in [(files[0], "legacy"), (files[0], "streaming"), (files[1], "streaming")]:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.gpx_memory_benchmark", "--measure", parser, str(file)],
+                capture_output=True, text=True, check=True,
+            ).stdout.split()
+            print("%-15s %-10s %10.1f %10s %16s %10s" % (
+                file.name, parser, file.stat().st_size / 1e6, output[0], output[1], output[2]
+            ))
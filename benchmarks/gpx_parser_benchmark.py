@@ -0,0 +1,31 @@
+# Run from the repository root: python -m benchmarks.gpx_parser_benchmark
+import time
+from pathlib import Path
+import numpy as np
+from map_tools.gpx import read_gpx_file
+from .legacy_gpx import read_gpx_legacy
+
+repetitions = 5
+
+
+def best_time(function, file: str) -> float:
+    timings = []
+    for _ in range(repetitions):
+        t0 = time.perf_counter()
+        function(file)
+        timings.append(time.perf_counter() - t0)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    print("%-30s %10s %8s %12s %12s %8s" % ("file", "size [MB]", "points", "legacy [ms]", "bulk [ms]", "speedup"))
+    for path in sorted(Path("route_files").glob("*.gpx")):
+        file = str(path)
+        legacy_array, legacy_time = read_gpx_legacy(file)
+        bulk_array, bulk_time = read_gpx_file(file)
+        assert legacy_time == bulk_time and np.allclose(legacy_array, bulk_array), file
+        t_legacy = best_time(read_gpx_legacy, file)
+        t_bulk = best_time(read_gpx_file, file)
+        print("%-30s %10.2f %8i %12.1f %12.1f %7.1fx" % (
+            path.name, path.stat().st_size / 1e6, len(bulk_array), 1e3 * t_legacy, 1e3 * t_bulk, t_legacy / t_bulk
+        ))
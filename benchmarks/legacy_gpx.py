@@ -0,0 +1,39 @@
+import numpy as np
+from datetime import datetime
+
+
+# Line-by-line parser that Route.read_gpx used before map_tools.gpx, kept as a benchmark reference.
+def read_gpx_legacy(file: str) -> (np.ndarray, bool):
+    with open(file) as f:
+        lines = f.readlines()
+        n_segments = " ".join(lines).count("</trkpt>")
+        route_array = np.zeros([n_segments, 4])
+        segment_counter = 0
+        time_data_available = False
+        for line in lines:
+            stripped_line = line.strip()
+            if stripped_line.startswith("<trkpt"):
+                split_line = line.split("=")
+                route_array[segment_counter, 0] = split_line[1][1:-5]  # latitude
+                route_array[segment_counter, 1] = split_line[2][1:-3]  # longitude
+            elif stripped_line.startswith("<ele>"):
+                route_array[segment_counter, 2] = stripped_line.strip(
+                    "<ele>"
+                ).strip("</ele>")  # altitude
+            elif stripped_line.startswith("<time>"):
+                time_data_available = True
+                time_string = stripped_line.strip("<time>").strip("</time>")
+                try:
+                    time = datetime.strptime(time_string, "%Y-%m-%dT%H:%M:%SZ")
+                except ValueError:
+                    time = datetime.strptime(time_string, "%Y-%m-%dT%H:%M:%S.%fZ")
+                if segment_counter == 0:
+                    start_time = time
+                route_array[segment_counter, 3] = (
+                    time - start_time
+                ).total_seconds()  # seconds since first segment
+            elif stripped_line.startswith("</trkpt>"):
+                segment_counter = segment_counter + 1
+            else:
+                continue
+    return route_array, time_data_available
@@ -0,0 +1,59 @@
+# Run from the repository root: python -m benchmarks.movie_writer_benchmark
+# Needs ffmpeg (ffmpeg_path in config.yaml). The map tiles are loaded during the warm-up frames.
+import tempfile
+import time
+from pathlib import Path
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import matplotlib.animation as mani
+from map_tools.route import Route
+from map_tools.plotting import get_frame_extent
+from map_tools.movie import get_frame_route
+from map_tools.movie_frame import FrameRenderer
+from map_tools.frame_writer import FrameWriter
+from map_tools.config import get_yaml_config
+
+cfg = get_yaml_config()
+
+route_file = "route_files/Super_Mario_Ebersberg.gpx"
+warmup_frames = 10
+nframes = 100
+
+
+def get_matplotlib_writer() -> mani.FFMpegWriter:
+    # the writer init_movie used before FrameWriter
+    plt.rcParams["animation.ffmpeg_path"] = cfg["ffmpeg_path"]
+    plt.rcParams["savefig.bbox"] = "tight"
+    return mani.FFMpegWriter(fps=cfg["frames_per_second"], extra_args=["-vcodec", "libx264"])
+
+
+def frames_per_second(frame_route: Route, writer, dynamic: bool, output_file: str) -> float:
+    fig = plt.figure()
+    frames = range(len(frame_route) // 2, len(frame_route) // 2 + warmup_frames + nframes)
+    static_extent = None if dynamic else get_frame_extent(frame_route)
+    with writer.saving(fig, output_file, cfg["video_dpi_resolution"]):
+        renderer = FrameRenderer(fig, [frame_route], writer.dpi, static_extent=static_extent)
+        for i in frames:
+            if i == frames[warmup_frames]:
+                t0 = time.perf_counter()
+            subroute = frame_route.prefix(i)
+            renderer.update([subroute], static_extent or get_frame_extent(subroute, fixed_size=0.1, center_on="last"))
+            renderer.grab_frame(writer)
+        elapsed = time.perf_counter() - t0
+    plt.close(fig)
+    plt.rcParams["savefig.bbox"] = None
+    return nframes / elapsed
+
+
+if __name__ == "__main__":
+    frame_route, advancing = get_frame_route(Route(route_file), 150.)
+    print("%s, %i frames at %i dpi" % (route_file, nframes, cfg["video_dpi_resolution"]))
+    with tempfile.TemporaryDirectory() as output_dir:
+        output_file = str(Path(output_dir) / "benchmark.mp4")
+        print("dynamic map, FFMpegWriter.grab_frame: %6.1f frames/s"
+              % frames_per_second(frame_route, get_matplotlib_writer(), True, output_file))
+        print("dynamic map, FrameWriter:             %6.1f frames/s"
+              % frames_per_second(frame_route, FrameWriter(), True, output_file))
+        print("static map,  FrameWriter:             %6.1f frames/s"
+              % frames_per_second(frame_route, FrameWriter(), False, output_file))
@@ -0,0 +1,33 @@
+# Run from the repository root: python -m benchmarks.parallel_movie_benchmark
+# Needs ffmpeg (ffmpeg_path in config.yaml) and writes output/parallel_benchmark.mp4. Each worker loads its own
+# map tiles, so the first run fills the disk tile cache and is excluded from the comparison.
+import os
+import time
+import matplotlib
+matplotlib.use("Agg")
+from map_tools.route import Route
+from map_tools.movie import make_movie_with_static_map
+from map_tools.config import get_yaml_config
+
+cfg = get_yaml_config()
+
+route_file = "route_files/Super_Mario_Ebersberg.gpx"
+
+
+def movie_time(workers: int) -> float:
+    t0 = time.perf_counter()
+    make_movie_with_static_map(route, output_file="parallel_benchmark", workers=workers)
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    route = Route(route_file)
+    movie_time(1)
+    worker_counts = [1] + [n for n in [2, 4, 8, 16, 32] if n <= (os.cpu_count() or 1)]
+    print("\n%s, static map movie" % route_file)
+    print("%8s %10s %8s" % ("workers", "time [s]", "speedup"))
+    serial_time = None
+    for workers in worker_counts:
+        elapsed = movie_time(workers)
+        serial_time = serial_time or elapsed
+        print("\n%8i %10.1f %8.2f" % (workers, elapsed, serial_time / elapsed))
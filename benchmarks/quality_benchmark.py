@@ -0,0 +1,31 @@
+# Run from the repository root: python -m benchmarks.quality_benchmark
+# Needs ffmpeg (ffmpeg_path in config.yaml) and writes output/quality_benchmark.mp4. Every quality tier maps at its
+# own zoom level, so the tiles are loaded in a first run that is excluded from the comparison.
+import matplotlib
+matplotlib.use("Agg")
+from map_tools.route import Route
+from map_tools.movie import make_movie_with_dynamic_map
+from map_tools.quality import render_times
+from map_tools.config import get_yaml_config
+
+cfg = get_yaml_config()
+
+route_file = "route_files/Super_Mario_Ebersberg.gpx"
+qualities = ["draft", "preview", "final"]
+
+
+if __name__ == "__main__":
+    route = Route(route_file)
+    for quality in qualities:
+        make_movie_with_dynamic_map(route, output_file="quality_benchmark", quality=quality)
+    warmup_times = render_times.times.copy()
+    render_times.clear()
+    for quality in qualities:
+        make_movie_with_dynamic_map(route, output_file="quality_benchmark", quality=quality)
+    print("\n%s, dynamic map movie" % route_file)
+    print("%8s %10s %16s %8s" % ("quality", "time [s]", "first run [s]", "speedup"))
+    for quality in qualities:
+        print("%8s %10.1f %16.1f %8.2f" % (
+            quality, render_times.times[quality], warmup_times[quality],
+            render_times.times["final"] / render_times.times[quality],
+        ))
@@ -0,0 +1,68 @@
+# Run from the repository root: python -m benchmarks.route_metrics_benchmark
+import time
+import numpy as np
+from map_tools.route import Route, get_rolling_speed, get_moving_average_speed
+from map_tools.config import get_yaml_config
+
+cfg = get_yaml_config()
+
+route_file = "route_files/Munich_Budapest.gpx"
+repetitions = 5
+
+
+def get_route_segments_loop(route: Route, minimum_speed_for_segment: float = 10.0) -> np.ndarray:
+    # per-point loop that Route.get_route_segments used before it was vectorized
+    is_segment = np.zeros(route.n_gps_entries)
+    is_segment[route.speed > minimum_speed_for_segment] = 1
+    latest_id = 0
+    segment_id = np.zeros(route.n_gps_entries)
+    for i in range(route.n_gps_entries):
+        if is_segment[i]:
+            if i == 0 or not is_segment[i - 1]:
+                latest_id += 1
+            segment_id[i] = latest_id
+    return segment_id
+
+
+def best_time(function) -> float:
+    timings = []
+    for _ in range(repetitions):
+        t0 = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - t0)
+    return 1e3 * min(timings)
+
+
+def hud_speeds_masked(route: Route, window: int) -> None:
+    # per-frame HUD speeds as plot_frame computed them before the prefix sums
+    for i in range(2, len(route) + 1):
+        view = route.prefix(i)
+        np.mean(view.speed[max(i - window, 0):-1])
+        np.mean(view.speed[view.speed > cfg["minimum_moving_speed"]])
+
+
+def hud_speeds_prefix_sums(route: Route, window: int) -> None:
+    for i in range(2, len(route) + 1):
+        view = route.prefix(i)
+        get_rolling_speed(view, window)
+        get_moving_average_speed(view)
+
+
+def load_eager() -> None:
+    route = Route(route_file, use_cache=False)
+    route.compute_all_columns()
+
+
+if __name__ == "__main__":
+    route = Route(route_file, use_cache=False)
+    assert np.array_equal(get_route_segments_loop(route), route.get_route_segments())
+    print("Route segments, %i points" % len(route))
+    print("  python loop:      %8.2f ms" % best_time(lambda: get_route_segments_loop(route)))
+    print("  vectorized:       %8.2f ms" % best_time(route.get_route_segments))
+    print("Route loading without cache")
+    print("  all columns:      %8.2f ms" % best_time(load_eager))
+    print("  lazy columns:     %8.2f ms" % best_time(lambda: Route(route_file, use_cache=False)))
+    window = 4 * cfg["frames_per_second"]
+    print("HUD speeds for every prefix of the route")
+    print("  masked means:     %8.2f ms" % best_time(lambda: hud_speeds_masked(route, window)))
+    print("  prefix sums:      %8.2f ms" % best_time(lambda: hud_speeds_prefix_sums(route, window)))
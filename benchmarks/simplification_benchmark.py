@@ -0,0 +1,48 @@
+# Run from the repository root: python -m benchmarks.simplification_benchmark
+import time
+from pathlib import Path
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import cartopy.crs as ccrs
+from map_tools.route import Route
+from map_tools.plotting import get_frame_extent, get_zoom_level_for_extent
+from map_tools.simplify import get_simplified_indices
+from map_tools.config import get_yaml_config
+
+cfg = get_yaml_config()
+
+repetitions = 5
+
+
+def draw_time(longitude: np.ndarray, latitude: np.ndarray, extent: list) -> float:
+    # same axes and transform as plot_route_on_map, without the background tiles
+    timings = []
+    for _ in range(repetitions):
+        fig = plt.figure(dpi=cfg["video_dpi_resolution"])
+        t0 = time.perf_counter()
+        ax = plt.axes(projection=ccrs.Mercator.GOOGLE)
+        ax.set_extent(extent)
+        plt.plot(longitude, latitude, transform=ccrs.PlateCarree(), lw=cfg["route_thickness"])
+        fig.canvas.draw()
+        timings.append(time.perf_counter() - t0)
+        plt.close(fig)
+    return 1e3 * min(timings)
+
+
+if __name__ == "__main__":
+    print("%-30s %6s %8s %10s %14s %10s %12s" % (
+        "file", "zoom", "points", "vertices", "simplify [ms]", "draw [ms]", "draw simpl."))
+    for path in sorted(Path("route_files").glob("*.gpx")):
+        route = Route(str(path))
+        for extent in [get_frame_extent(route), get_frame_extent(route, fixed_size=0.1, center_on="last")]:
+            zoom_level = get_zoom_level_for_extent(extent)
+            t0 = time.perf_counter()
+            indices = get_simplified_indices(route, zoom_level)
+            simplify_time = 1e3 * (time.perf_counter() - t0)
+            print("%-30s %6i %8i %10i %14.1f %10.1f %12.1f" % (
+                path.name, zoom_level, len(route), len(indices), simplify_time,
+                draw_time(route.longitude, route.latitude, extent),
+                draw_time(route.longitude[indices], route.latitude[indices], extent),
+            ))
@@ -0,0 +1,245 @@
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from .config import get_yaml_config
+
+cfg = get_yaml_config()
+
+
+class VideoOutput(object):
+    # An additional video encoded by the same ffmpeg process from the same frames, e.g. a lower resolution or a short
+    # preview clip. It is written next to the main video, with the suffix added to its file name.
+    suffix: str
+    height: Optional[int] = None  # in pixels, the width keeps the aspect ratio
+    max_seconds: Optional[float] = None
+    codec: Optional[str] = None  # the codec of the main video by default
+    extra_args: List[str]
+
+    def __init__(
+            self,
+            suffix: str,
+            height: Optional[int] = None,
+            max_seconds: Optional[float] = None,
+            codec: Optional[str] = None,
+            extra_args: Optional[List[str]] = None,
+    ) -> None:
+        self.suffix = suffix
+        self.height = height
+        self.max_seconds = max_seconds
+        self.codec = codec
+        self.extra_args = extra_args or []
+
+    def get_path(self, outfile: str) -> str:
+        path = Path(outfile)
+        return str(path.with_name(path.stem + self.suffix + path.suffix))
+
+    def get_args(self) -> List[str]:
+        args = []
+        if self.height is not None:
+            args += ["-vf", "scale=-2:%i" % self.height]  # libx264 needs an even width
+        if self.max_seconds is not None:
+            args += ["-t", "%g" % self.max_seconds]
+        return args + self.extra_args
+
+    def get_segment(self, start_seconds: float) -> Optional["VideoOutput"]:
+        # the part of this output in a movie segment starting at start_seconds, None if the output ends before it
+        if self.max_seconds is None:
+            return self
+        if self.max_seconds <= start_seconds:
+            return None
+        return VideoOutput(self.suffix, self.height, self.max_seconds - start_seconds, self.codec, self.extra_args)
+
+
+def get_configured_outputs() -> List[VideoOutput]:
+    return [VideoOutput(**output) for output in cfg["movie_outputs"]]
+
+
+class FrameWriter(object):
+    # Streams the RGBA buffer of the Agg canvas directly into the stdin of an ffmpeg process. Unlike
+    # matplotlib's FFMpegWriter.grab_frame, no savefig (and no tight bounding box) is run per frame: the figure
+    # is rendered at a fixed pixel size and its layout is left as it is.
+    # With queue_size > 0, the frames are copied into a bounded queue and piped by a writer thread, so that the
+    # next frame is rendered while ffmpeg reads and encodes the previous ones. A full queue blocks the renderer
+    # (stall_time) and caps the memory used by pending frames.
+    # Additional outputs are encoded by the same ffmpeg process, which reads and decodes every frame only once.
+    fps: float
+    codec: str
+    ffmpeg_path: str
+    extra_args: List[str]
+    metadata: Dict[str, str]
+    queue_size: int
+    outputs: List[VideoOutput]
+    figure: Optional[plt.Figure] = None
+    dpi: float = 100.
+    frame_size: tuple = (0, 0)
+    nframes: int = 0
+    stall_time: float = 0.
+    max_queue_depth: int = 0
+    queue_depth_sum: int = 0
+
+    def __init__(
+            self,
+            fps: float = cfg["frames_per_second"],
+            codec: str = "libx264",
+            ffmpeg_path: str = cfg["ffmpeg_path"],
+            extra_args: Optional[List[str]] = None,
+            metadata: Optional[Dict[str, str]] = None,
+            queue_size: int = cfg["frame_queue_size"],
+            outputs: Optional[List[VideoOutput]] = None,
+    ) -> None:
+        self.fps = fps
+        self.codec = codec
+        self.ffmpeg_path = ffmpeg_path
+        self.extra_args = extra_args if extra_args is not None else ["-pix_fmt", "yuv420p"]
+        self.metadata = metadata or {}
+        self.queue_size = queue_size
+        self.outputs = outputs or []
+        self._proc = None
+        self.error_log = None
+        self.frame_queue = None
+        self.writer_thread = None
+        self.write_error = None
+
+    def setup(self, fig: plt.Figure, outfile: str, dpi: Optional[float] = None) -> None:
+        self.figure = fig
+        if dpi is not None:
+            self.dpi = dpi
+        if not isinstance(fig.canvas, FigureCanvasAgg):
+            FigureCanvasAgg(fig)
+        # libx264 needs even frame sizes
+        width, height = fig.get_size_inches()
+        self.frame_size = (int(width * self.dpi) // 2 * 2, int(height * self.dpi) // 2 * 2)
+        fig.set_dpi(self.dpi)
+        # the canvas truncates its pixel size, hence the small margin against rounding errors
+        fig.set_size_inches((self.frame_size[0] + 1e-3) / self.dpi, (self.frame_size[1] + 1e-3) / self.dpi)
+        self.nframes = 0
+        self.stall_time = 0.
+        self.max_queue_depth = 0
+        self.queue_depth_sum = 0
+        self.write_error = None
+        # a file instead of a pipe, which ffmpeg could fill up and block on since it is only read by finish
+        self.error_log = tempfile.TemporaryFile()
+        self._proc = subprocess.Popen(
+            self.get_command(outfile),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=self.error_log,
+        )
+        if self.queue_size > 0:
+            self.frame_queue = queue.Queue(maxsize=self.queue_size)
+            self.writer_thread = threading.Thread(target=self.pipe_queued_frames, args=(self._proc,), daemon=True)
+            self.writer_thread.start()
+
+    def get_command(self, outfile: str) -> List[str]:
+        command = [
+            self.ffmpeg_path, "-loglevel", "error",
+            "-f", "rawvideo", "-vcodec", "rawvideo", "-pix_fmt", "rgba",
+            "-s", "%ix%i" % self.frame_size, "-r", str(self.fps), "-i", "pipe:",
+        ]
+        command += self.get_output_args(self.codec) + ["-y", outfile]
+        for output in self.outputs:
+            command += self.get_output_args(output.codec or self.codec) + output.get_args()
+            command += ["-y", output.get_path(outfile)]
+        return command
+
+    def get_output_args(self, codec: str) -> List[str]:
+        args = ["-vcodec", codec]
+        for key, value in self.metadata.items():
+            args += ["-metadata", "%s=%s" % (key, value)]
+        return args + self.extra_args
+
+    @contextmanager
+    def saving(self, fig: plt.Figure, outfile: str, dpi: Optional[float] = None):
+        self.setup(fig, outfile, dpi)
+        try:
+            yield self
+        finally:
+            self.finish()
+
+    def grab_frame(self) -> None:
+        self.figure.canvas.draw()
+        self.write_frame(self.figure.canvas.buffer_rgba())
+
+    def write_frame(self, frame) -> None:
+        # frame: RGBA buffer of frame_size, e.g. the memoryview returned by buffer_rgba (piped without a copy
+        # unless frames are queued)
+        if memoryview(frame).nbytes != 4 * self.frame_size[0] * self.frame_size[1]:
+            raise IOError("Frame does not match the video size %ix%i, was the figure resized?" % self.frame_size)
+        if self.writer_thread is None:
+            try:
+                self._proc.stdin.write(frame)
+            except BrokenPipeError:
+                self.finish()
+        else:
+            if self.write_error is not None:
+                self.finish()
+            queue_depth = self.frame_queue.qsize()
+            self.queue_depth_sum += queue_depth
+            self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+            frame = bytes(frame)  # the canvas buffer is overwritten by the next frame
+            t0 = time.perf_counter()
+            self.frame_queue.put(frame)
+            self.stall_time += time.perf_counter() - t0
+        self.nframes += 1
+
+    def pipe_queued_frames(self, proc: subprocess.Popen) -> None:
+        while True:
+            frame = self.frame_queue.get()
+            if frame is None:
+                return
+            if self.write_error is None:  # keep emptying the queue after an error, so that the renderer never blocks
+                try:
+                    proc.stdin.write(frame)
+                except OSError as error:
+                    self.write_error = error
+
+    def finish(self) -> None:
+        if self._proc is None:
+            return
+        if self.writer_thread is not None:
+            self.frame_queue.put(None)
+            self.writer_thread.join()
+            self.writer_thread = None
+        proc, self._proc = self._proc, None
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        proc.wait()
+        error_log, self.error_log = self.error_log, None
+        error_log.seek(0)
+        stderr = error_log.read()
+        error_log.close()
+        if proc.returncode != 0:
+            raise IOError("ffmpeg failed with exit code %i: %s" % (proc.returncode, stderr.decode(errors="replace")))
+        if self.write_error is not None:
+            raise IOError("Writing the frames to ffmpeg failed: %s" % self.write_error)
+
+
+def concat_videos(
+        input_files: List[str],
+        outfile: str,
+        ffmpeg_path: str = cfg["ffmpeg_path"],
+        metadata: Optional[Dict[str, str]] = None,
+) -> None:
+    # Joins videos with identical encoding settings without re-encoding them (ffmpeg concat demuxer)
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as list_file:
+        for input_file in input_files:
+            list_file.write("file '%s'\n" % Path(input_file).resolve().as_posix().replace("'", "'\\''"))
+    command = [ffmpeg_path, "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_file.name, "-c", "copy"]
+    for key, value in (metadata or {}).items():
+        command += ["-metadata", "%s=%s" % (key, value)]
+    try:
+        result = subprocess.run(command + ["-y", outfile], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    finally:
+        os.unlink(list_file.name)
+    if result.returncode != 0:
+        raise IOError("ffmpeg failed to join the videos: %s" % result.stderr.decode(errors="replace"))
@@ -0,0 +1,102 @@
+import re
+import gzip
+import numpy as np
+from typing import BinaryIO, Tuple
+
+# One match per track point. GPX orders <ele> before <time> inside a point, so all four values
+# are picked up by a single scan over the file buffer.
+TRKPT_PATTERN = re.compile(
+    rb'<trkpt\s[^>]*?lat="([^"]*)"[^>]*?lon="([^"]*)"[^>]*>'
+    rb"\s*(?:<ele>([^<]*)</ele>\s*)?"
+    rb"(?:<time>([^<Z]*)Z?</time>)?"
+)
+CHUNK_SIZE = 1 << 22  # bytes of (uncompressed) GPX text parsed at a time
+
+
+class GrowableArray(object):
+    data: np.ndarray
+    size: int = 0
+
+    def __init__(self, dtype: np.dtype, initial_capacity: int = 1024) -> None:
+        self.data = np.empty(initial_capacity, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values: np.ndarray) -> None:
+        new_size = self.size + len(values)
+        if new_size > len(self.data):
+            new_data = np.empty(max(new_size, 2 * len(self.data)), dtype=self.data.dtype)
+            new_data[:self.size] = self.data[:self.size]
+            self.data = new_data
+        self.data[self.size:new_size] = values
+        self.size = new_size
+
+    def to_array(self) -> np.ndarray:
+        return self.data[:self.size]
+
+
+def open_gpx(file: str) -> BinaryIO:
+    if file.endswith(".gz"):
+        return gzip.open(file, "rb")
+    return open(file, "rb")
+
+
+def read_gpx_file(file: str, chunk_size: int = CHUNK_SIZE) -> Tuple[np.ndarray, bool]:
+    columns = [
+        GrowableArray(np.float64),
+        GrowableArray(np.float64),
+        GrowableArray(np.float64),
+        GrowableArray(np.dtype("datetime64[us]")),
+    ]
+    tail = b""
+    with open_gpx(file) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            buffer = tail + chunk
+            if len(chunk) > 0:
+                # every point before the last opening tag is complete, the rest is parsed with the next chunk
+                split_position = buffer.rfind(b"<trkpt")
+                if split_position <= 0:
+                    tail = buffer
+                    continue
+                buffer, tail = buffer[:split_position], buffer[split_position:]
+            for column, values in zip(columns, parse_trkpt_columns(buffer)):
+                column.extend(values)
+            if len(chunk) == 0:
+                break
+    return assemble_route_array(*(column.to_array() for column in columns))
+
+
+def parse_gpx(buffer: bytes) -> Tuple[np.ndarray, bool]:
+    return assemble_route_array(*parse_trkpt_columns(buffer))
+
+
+def parse_trkpt_columns(buffer: bytes) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    matches = TRKPT_PATTERN.findall(buffer)
+    if len(matches) == 0:
+        return np.zeros(0), np.zeros(0), np.zeros(0), np.zeros(0, dtype="datetime64[us]")
+    latitude, longitude, altitude, time = np.array(matches).T
+    has_altitude = altitude != b""
+    altitude_values = np.zeros(len(matches))
+    altitude_values[has_altitude] = altitude[has_altitude].astype(np.float64)
+    time[time == b""] = b"NaT"
+    return (
+        latitude.astype(np.float64),
+        longitude.astype(np.float64),
+        altitude_values,
+        time.astype("datetime64[us]"),
+    )
+
+
+def assemble_route_array(
+        latitude: np.ndarray, longitude: np.ndarray, altitude: np.ndarray, timestamps: np.ndarray
+) -> Tuple[np.ndarray, bool]:
+    route_array = np.zeros([len(latitude), 4])
+    route_array[:, 0] = latitude
+    route_array[:, 1] = longitude
+    route_array[:, 2] = altitude
+    has_time = ~np.isnat(timestamps)
+    time_data_available = bool(np.any(has_time))
+    if time_data_available:
+        # seconds since first segment
+        route_array[has_time, 3] = (timestamps[has_time] - timestamps[has_time][0]) / np.timedelta64(1, "s")
+    return route_array, time_data_available
@@ -0,0 +1,188 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib import colors
+from matplotlib.backends.backend_agg import RendererAgg
+from matplotlib.font_manager import FontProperties
+from matplotlib.text import Text
+from matplotlib.transforms import IdentityTransform
+from .config import get_yaml_config
+from typing import Dict, List, Optional, Tuple
+
+cfg = get_yaml_config()
+
+data_labels = ["Distance", "Elevation", "Time", "Speed"]
+data_positions = [0.1, 0.35, 0.65, 0.9]  # centers of the data columns below the map, in axes coordinates
+
+
+def get_data_texts(distance: float, elevation: float, time: float, speed: float) -> List[str]:
+    # values shown below the map by add_data_to_bottom
+    hours = int(time/3600.)
+    minutes = int((time-3600*hours)/60)
+    return ["%3i km" %distance, "%3i m" %elevation, "%ih%im" %(hours, minutes), "%.1f km/h" %np.round(speed, 1)]
+
+
+class RasterText(object):
+    # A text rendered once by the Agg text renderer, as coverage (0 to 1) around its pen origin on the baseline
+    coverage: np.ndarray
+    left: int  # column of the first coverage column, relative to the pen origin
+    top: int  # row of the first coverage row, relative to the baseline (negative above it)
+    width: float  # layout width in pixels, as used by matplotlib to align the text
+
+    def __init__(self, coverage: np.ndarray, left: int, top: int, width: float) -> None:
+        self.coverage = coverage
+        self.left = left
+        self.top = top
+        self.width = width
+
+
+def rasterize_text(text: str, fontproperties: FontProperties, dpi: float) -> RasterText:
+    renderer = RendererAgg(1, 1, dpi)
+    width, height, descent = renderer.get_text_width_height_descent(text, fontproperties, ismath=False)
+    margin = int(np.ceil(height)) + 2
+    renderer = RendererAgg(int(np.ceil(width)) + 2 * margin, int(np.ceil(height)) + 2 * margin, dpi)
+    artist = Text(margin, margin, text, fontproperties=fontproperties, color="k", transform=IdentityTransform(),
+                  verticalalignment="baseline")
+    artist.set_figure(plt.Figure(dpi=dpi))
+    artist.draw(renderer)
+    alpha = np.asarray(renderer.buffer_rgba())[:, :, 3]
+    rows, columns = np.nonzero(alpha)
+    if len(rows) == 0:  # e.g. spaces
+        return RasterText(np.zeros((0, 0), dtype=np.float32), 0, 0, width)
+    coverage = alpha[rows.min():rows.max() + 1, columns.min():columns.max() + 1].astype(np.float32) / 255.
+    baseline_row = alpha.shape[0] - margin
+    return RasterText(coverage, columns.min() - margin, rows.min() - baseline_row, width)
+
+
+def blend_text(frame: np.ndarray, text: RasterText, x: float, y: float, color: np.ndarray) -> None:
+    # Blends the text into the RGBA frame (rows from the top) with its pen origin at the display coordinates x, y
+    # (from the bottom of the figure).
+    if text.coverage.size == 0:
+        return
+    row = frame.shape[0] - int(round(y)) + text.top
+    column = int(round(x)) + text.left
+    row_start, column_start = max(row, 0), max(column, 0)
+    row_end = min(row + text.coverage.shape[0], frame.shape[0])
+    column_end = min(column + text.coverage.shape[1], frame.shape[1])
+    if row_start >= row_end or column_start >= column_end:
+        return
+    alpha = text.coverage[row_start - row:row_end - row, column_start - column:column_end - column, np.newaxis]
+    region = frame[row_start:row_end, column_start:column_end, :3]
+    region[...] = (region * (1. - alpha) + color * alpha + 0.5).astype(np.uint8)
+
+
+class GlyphCache(object):
+    # Characters of one font rendered on first use, so that changing values are composited glyph by glyph instead
+    # of being laid out and rendered by matplotlib for every frame.
+    fontproperties: FontProperties
+    dpi: float
+    glyphs: Dict[str, Tuple[RasterText, float]]
+
+    def __init__(self, fontproperties: FontProperties, dpi: float) -> None:
+        self.fontproperties = fontproperties
+        self.dpi = dpi
+        self.glyphs = {}
+        self.renderer = RendererAgg(1, 1, dpi)
+
+    def get(self, char: str) -> Tuple[RasterText, float]:
+        # the rendered character and its advance in pixels
+        if char not in self.glyphs:
+            # measured between two digits, which also counts the width of spaces
+            advance = self.get_layout_width("0" + char + "0") - self.get_layout_width("00")
+            self.glyphs[char] = (rasterize_text(char, self.fontproperties, self.dpi), advance)
+        return self.glyphs[char]
+
+    def get_layout_width(self, text: str) -> float:
+        return self.renderer.get_text_width_height_descent(text, self.fontproperties, ismath=False)[0]
+
+    def get_width(self, text: str) -> float:
+        return sum(self.get(char)[1] for char in text)
+
+    def blend(self, frame: np.ndarray, text: str, x: float, y: float, color: np.ndarray) -> None:
+        # text centered on x, with its baseline at y
+        pen = x - 0.5 * self.get_width(text)
+        for char in text:
+            glyph, advance = self.get(char)
+            blend_text(frame, glyph, pen, y, color)
+            pen += advance
+
+
+class DataHud(object):
+    # The data below the map (distance, elevation, time, speed) and the global time of race movies, as text artists
+    # in axes coordinates. Still images draw these artists. Movies call rasterize once the layout is fixed: the
+    # labels are rendered once, the text artists are hidden, and composite blends the labels and the glyphs of the
+    # current values into every rendered frame.
+    axes: plt.Axes
+    label_texts: list
+    value_texts: list
+    global_time_text: object = None
+    rasterized: bool = False
+    raster_labels: list
+    value_anchors: list
+    value_glyphs: Optional[GlyphCache] = None
+    global_time_anchor: tuple = (0., 0.)
+    global_time_glyphs: Optional[GlyphCache] = None
+
+    def __init__(self, axes: plt.Axes, add_data: bool = True, show_global_time: bool = False) -> None:
+        self.axes = axes
+        self.label_texts, self.value_texts = [], []
+        if add_data:
+            for position, label in zip(data_positions, data_labels):
+                self.label_texts.append(axes.text(
+                    position, -0.05, label, color=cfg["text_color"], transform=axes.transAxes,
+                    horizontalalignment="center", fontsize=cfg["fontsize_small"],
+                ))
+                self.value_texts.append(axes.text(
+                    position, -0.1, "", color=cfg["text_color"], transform=axes.transAxes,
+                    horizontalalignment="center", weight="bold", fontsize=cfg["fontsize_large"],
+                ))
+        if show_global_time:
+            self.global_time_text = axes.text(
+                0.5, -0.026, "", color=cfg["text_color"], transform=axes.transAxes,
+                horizontalalignment="center", fontsize=8,
+            )
+        self.color = np.array(colors.to_rgb(cfg["text_color"])) * 255.
+
+    def set_data(self, distance: float, elevation: float, time: float, speed: float) -> None:
+        for value_text, text in zip(self.value_texts, get_data_texts(distance, elevation, time, speed)):
+            value_text.set_text(text)
+
+    def set_global_time(self, text: str) -> None:
+        if self.global_time_text is not None:
+            self.global_time_text.set_text(text)
+
+    def get_texts(self) -> list:
+        texts = self.label_texts + self.value_texts
+        if self.global_time_text is not None:
+            texts.append(self.global_time_text)
+        return texts
+
+    def rasterize(self) -> None:
+        # the text positions in pixels are taken from the current layout
+        dpi = self.axes.figure.dpi
+        self.raster_labels = []
+        for label_text in self.label_texts:
+            label = rasterize_text(label_text.get_text(), label_text.get_fontproperties(), dpi)
+            x, y = get_display_position(label_text)
+            self.raster_labels.append((label, x - 0.5 * label.width, y))
+        self.value_anchors = [get_display_position(value_text) for value_text in self.value_texts]
+        if len(self.value_texts) > 0:
+            self.value_glyphs = GlyphCache(self.value_texts[0].get_fontproperties(), dpi)
+        if self.global_time_text is not None:
+            self.global_time_anchor = get_display_position(self.global_time_text)
+            self.global_time_glyphs = GlyphCache(self.global_time_text.get_fontproperties(), dpi)
+        for text in self.get_texts():
+            text.set_visible(False)
+        self.rasterized = True
+
+    def composite(self, frame: np.ndarray) -> None:
+        # frame: RGBA array of the rendered figure, e.g. np.asarray(canvas.buffer_rgba())
+        for label, x, y in self.raster_labels:
+            blend_text(frame, label, x, y, self.color)
+        for value_text, (x, y) in zip(self.value_texts, self.value_anchors):
+            self.value_glyphs.blend(frame, value_text.get_text(), x, y, self.color)
+        if self.global_time_glyphs is not None:
+            self.global_time_glyphs.blend(frame, self.global_time_text.get_text(), *self.global_time_anchor, self.color)
+
+
+def get_display_position(text: Text) -> Tuple[float, float]:
+    return tuple(text.get_transform().transform(text.get_position()))
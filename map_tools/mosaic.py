@@ -0,0 +1,50 @@
+import numpy as np
+from typing import List, Tuple
+from .config import get_yaml_config
+
+cfg = get_yaml_config()
+
+tile_size = 256
+earth_radius = 6378137.0  # of the spherical Web-Mercator projection used by the OSM tiles
+
+
+def get_global_pixels(longitude: np.ndarray, latitude: np.ndarray, zoom: int) -> Tuple[np.ndarray, np.ndarray]:
+    # pixel coordinates in the map of the whole world at this zoom level, y pointing south
+    map_size = tile_size * 2 ** zoom
+    latitude = np.radians(np.clip(np.asarray(latitude, dtype=float), -85.0511, 85.0511))
+    x = (np.asarray(longitude, dtype=float) + 180.) / 360. * map_size
+    y = (1. - np.arcsinh(np.tan(latitude)) / np.pi) / 2. * map_size
+    return x, y
+
+
+def pixels_to_mercator(x: np.ndarray, y: np.ndarray, zoom: int) -> Tuple[np.ndarray, np.ndarray]:
+    map_size = tile_size * 2 ** zoom
+    return (
+        (np.asarray(x) / map_size - 0.5) * 2. * np.pi * earth_radius,
+        (0.5 - np.asarray(y) / map_size) * 2. * np.pi * earth_radius,
+    )
+
+
+def project_to_mercator(longitude: np.ndarray, latitude: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # to the data coordinates of the map axes
+    return pixels_to_mercator(*get_global_pixels(longitude, latitude, 0), 0)
+
+
+def get_map_image(tile_source: object, extent: List[float], zoom: int) -> Tuple[np.ndarray, List[float]]:
+    # The map pixels covering the extent, cut out of the tiles with NumPy slicing, and their extent in Mercator
+    # coordinates.
+    x, y = get_global_pixels(extent[:2], [extent[3], extent[2]], zoom)
+    x0, x1 = int(np.floor(x[0])), int(np.ceil(x[1]))
+    y0, y1 = int(np.floor(y[0])), int(np.ceil(y[1]))
+    image = np.full((y1 - y0, x1 - x0, 3), 255, dtype=np.uint8)
+    n_tiles = 2 ** zoom
+    for tile_y in range(max(y0 // tile_size, 0), min((y1 - 1) // tile_size, n_tiles - 1) + 1):
+        for tile_x in range(x0 // tile_size, (x1 - 1) // tile_size + 1):
+            tile = tile_source.get_image((tile_x % n_tiles, tile_y, zoom))[0]
+            left, top = tile_x * tile_size, tile_y * tile_size
+            column_start, column_end = max(x0, left), min(x1, left + tile_size)
+            row_start, row_end = max(y0, top), min(y1, top + tile_size)
+            image[row_start - y0:row_end - y0, column_start - x0:column_end - x0] = \
+                tile[row_start - top:row_end - top, column_start - left:column_end - left, :3]
+    (left, right), (top, bottom) = pixels_to_mercator([x0, x1], [y0, y1], zoom)
+    return image, [left, right, bottom, top]
@@ -1,50 +1,140 @@
 import sys
-from typing import List, Tuple
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
 import numpy as np
 import matplotlib.pyplot as plt
-import matplotlib.animation as mani
-from .plotting import get_frame_extent, get_frame_extent_multiple, create_background_map
-from .movie_frame import plot_frame, get_dynamic_frame_extent_for_multiple_routes
+from .plotting import get_frame_extent, get_frame_extent_multiple
+from .movie_frame import get_dynamic_frame_extent_for_multiple_routes, get_global_time_text, FrameRenderer
 from .config import get_yaml_config
-from .route import Route
-import cartopy.crs as ccrs
+from .route import Route, RouteLike, resample_route
+from .frame_writer import FrameWriter, VideoOutput, concat_videos, get_configured_outputs
+from .quality import rendering_quality, get_frames_per_second, get_video_dpi
 
 cfg = get_yaml_config()
 
 
-def init_movie(output_file: str) -> Tuple[plt.Figure, mani.FFMpegWriter]:
-    plt.rcParams["animation.ffmpeg_path"] = cfg["ffmpeg_path"]
-    plt.rcParams["savefig.bbox"] = "tight"
-    metadata = dict(title=output_file, artist="Matplotlib")
+def init_movie(output_file: str, outputs: Optional[List[VideoOutput]] = None) -> Tuple[plt.Figure, FrameWriter]:
     fig = plt.figure()
-    writer = mani.FFMpegWriter(
-        fps=cfg["frames_per_second"],
-        metadata=metadata,
-        extra_args=["-vcodec", "libx264"],
-    )
-    writer.setup(fig, output_file)
+    writer = FrameWriter(
+        fps=get_frames_per_second(), codec="libx264", metadata=get_movie_metadata(output_file), outputs=outputs)
     return fig, writer
 
 
+def get_movie_metadata(output_file: str) -> Dict[str, str]:
+    return dict(title=output_file, artist="Matplotlib")
+
+
+def use_agg_backend() -> None:
+    # worker processes only render off-screen, GUI backends must not be used after a fork
+    plt.switch_backend("Agg")
+
+
+class MovieFrame(object):
+    # What one video frame shows: the number of points of each route of its section (0 hides the route), the map
+    # extent and the global time.
+    __slots__ = ("stops", "extent", "current_time_in_seconds")
+    stops: List[int]
+    extent: List[float]
+    current_time_in_seconds: float
+
+    def __init__(self, stops: List[int], extent: List[float], current_time_in_seconds: float = 0.) -> None:
+        self.stops = stops
+        self.extent = extent
+        self.current_time_in_seconds = current_time_in_seconds
+
+
+class MovieSection(object):
+    # Consecutive frames drawn with one FrameRenderer, e.g. the moving map, the zoomout or the final still frames.
+    # Movies are planned as a list of sections first, so that any range of frames can be rendered on its own.
+    routes: List[Route]
+    static_extent: Optional[List[float]]
+    add_data: bool
+    show_global_time: bool
+    include_trail: bool
+    show_avg_speed: bool
+    frames: List[MovieFrame]
+
+    def __init__(
+            self,
+            routes: Sequence[Route],
+            static_extent: Optional[List[float]] = None,
+            add_data: bool = True,
+            show_global_time: bool = False,
+            include_trail: bool = True,
+            show_avg_speed: bool = False,
+    ) -> None:
+        self.routes = list(routes)
+        self.static_extent = static_extent
+        self.add_data = add_data
+        self.show_global_time = show_global_time
+        self.include_trail = include_trail
+        self.show_avg_speed = show_avg_speed
+        self.frames = []
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def add_frame(self, stops: List[int], extent: List[float], current_time_in_seconds: float = 0.) -> None:
+        self.frames.append(MovieFrame(stops, extent, current_time_in_seconds))
+
+    def get_subroutes(self, frame: MovieFrame) -> List[Optional[RouteLike]]:
+        return [route.prefix(stop) if stop > 0 else None for route, stop in zip(self.routes, frame.stops)]
+
+    def get_frame_key(self, frame: MovieFrame) -> tuple:
+        # everything that can change between two frames of the section; frames with equal keys look the same
+        global_time = get_global_time_text(frame.current_time_in_seconds) if self.show_global_time else None
+        return tuple(frame.stops), tuple(frame.extent), global_time
+
+
+class MovieStatistics(object):
+    # frame counts and frame queue usage of a movie, summed over the worker processes
+    rendered_frames: int = 0
+    repeated_frames: int = 0  # duplicates of the previous frame, written again without rendering
+    render_time: float = 0.
+    stall_time: float = 0.  # time the renderer waited for a free place in the frame queue
+    max_queue_depth: int = 0
+    queue_depth_sum: int = 0
+
+    def add(self, other: "MovieStatistics") -> None:
+        self.rendered_frames += other.rendered_frames
+        self.repeated_frames += other.repeated_frames
+        self.render_time += other.render_time
+        self.stall_time += other.stall_time
+        self.max_queue_depth = max(self.max_queue_depth, other.max_queue_depth)
+        self.queue_depth_sum += other.queue_depth_sum
+
+    def add_writer_statistics(self, writer: FrameWriter) -> None:
+        self.stall_time += writer.stall_time
+        self.max_queue_depth = max(self.max_queue_depth, writer.max_queue_depth)
+        self.queue_depth_sum += writer.queue_depth_sum
+
+    def print_report(self) -> None:
+        nframes = self.rendered_frames + self.repeated_frames
+        print("%i frames: %i rendered, %i repeated (%.1f %% of the renders saved), %.1f s rendering"
+              % (nframes, self.rendered_frames, self.repeated_frames,
+                 100. * self.repeated_frames / max(nframes, 1), self.render_time))
+        print("frame queue: %.1f s stalled, mean depth %.1f, max depth %i"
+              % (self.stall_time, self.queue_depth_sum / max(nframes, 1), self.max_queue_depth))
+
+
 def make_movie_with_static_map(
         route: Route,
         output_file: str = "movie",
-        real_seconds_per_video_second: float = 150.0
-) -> None:
-    fig, writer = init_movie(output_file)
-    progress_counter = 0
-    nframes = len(route.latitude)
-    frame_step = get_frame_step_from_real_time(route, real_seconds_per_video_second)
-    print("Using frame step: " + str(frame_step))
-    extent = get_frame_extent(route.full_route)
-    with writer.saving(fig, "output/" + output_file + ".mp4", cfg["video_dpi_resolution"]):
-        for i in range(1, nframes, frame_step):
-            subroute = route[0:i]
-            plot_frame(subroute, writer, extent=extent)
-            del subroute
-            progress_counter += 1
-            update_progress_bar(progress_counter, nframes, frame_step=frame_step)
-    writer.finish()
+        real_seconds_per_video_second: float = 150.0,
+        workers: int = 1,
+        quality: str = "final",
+        outputs: Optional[List[VideoOutput]] = None,
+) -> MovieStatistics:
+    with rendering_quality(quality):
+        frame_route, advancing = get_frame_route(route, real_seconds_per_video_second)
+        extent = get_frame_extent(route.full_route)
+        section = MovieSection([frame_route], static_extent=extent)
+        for i in np.flatnonzero(advancing) + 1:
+            section.add_frame([i], extent)
+        return render_movie([section], output_file, workers, quality, outputs)
 
 
 def make_movie_with_dynamic_map(
@@ -52,16 +142,17 @@ def make_movie_with_dynamic_map(
         map_frame_size_in_deg: float = 0.1,
         output_file: str = "movie",
         final_zoomout: bool = True,
-        real_seconds_per_video_second: float = 150.0
-) -> None:
-    fig, writer = init_movie(output_file)
-    progress_counter = 0
-    nframes = len(route.latitude)
-    frame_step = get_frame_step_from_real_time(route, real_seconds_per_video_second)
-    with writer.saving(fig, "output/" + output_file + ".mp4", cfg["video_dpi_resolution"]):
-        for i in range(1, nframes, frame_step):
-            subroute = route[0:i]
-            if i > cfg["frames_per_second"]:
+        real_seconds_per_video_second: float = 150.0,
+        workers: int = 1,
+        quality: str = "final",
+        outputs: Optional[List[VideoOutput]] = None,
+) -> MovieStatistics:
+    with rendering_quality(quality):
+        frame_route, advancing = get_frame_route(route, real_seconds_per_video_second)
+        section = MovieSection([frame_route])
+        for i in np.flatnonzero(advancing) + 1:
+            subroute = frame_route.prefix(i)
+            if i > get_frames_per_second():
                 extent = get_frame_extent(
                     subroute, fixed_size=map_frame_size_in_deg, center_on="last_smooth"
                 )
@@ -69,183 +160,270 @@ def make_movie_with_dynamic_map(
                 extent = get_frame_extent(
                     subroute, fixed_size=map_frame_size_in_deg, center_on="last"
                 )
-            plot_frame(subroute, writer, extent=extent)
-            del subroute
-            progress_counter += 1
-            update_progress_bar(progress_counter, nframes, frame_step=frame_step)
+            section.add_frame([i], extent)
+        sections = [section]
         if final_zoomout:
-            print("\nRendering final zoomout")
-            initial_extent = extent
-            final_extent = get_frame_extent(route)
-            progress_counter = 0
-            for i in range(cfg["movie_zoomout_seconds"] * cfg["frames_per_second"]):
-                current_extent = [
-                    initial_extent[j]
-                    + (float(i) / (cfg["movie_zoomout_seconds"] * cfg["frames_per_second"]))
-                    * (final_extent[j] - initial_extent[j])
-                    for j in range(len(initial_extent))
-                ]
-                plot_frame(route, writer, extent=current_extent, include_trail=False, show_avg_speed=True)
-                progress_counter += 1
-                update_progress_bar(
-                    progress_counter,
-                    cfg["movie_zoomout_seconds"] * cfg["frames_per_second"]
-                    + cfg["still_final_seconds"] * cfg["frames_per_second"],
-                )
-            for i in range(cfg["still_final_seconds"] * cfg["frames_per_second"]):
-                plot_frame(route, writer, extent=final_extent, include_trail=False, show_avg_speed=True)
-                progress_counter += 1
-                update_progress_bar(
-                    progress_counter,
-                    cfg["movie_zoomout_seconds"] * cfg["frames_per_second"]
-                    + cfg["still_final_seconds"] * cfg["frames_per_second"],
-                )
+            sections += get_final_zoomout_sections([route], extent, get_frame_extent(route), add_data=True)
+        return render_movie(sections, output_file, workers, quality, outputs)
 
 
 def make_movie_with_multiple_routes(
-        routes: List[Route],
+        routes: Sequence[Route],
         min_map_frame_size_in_deg: float = cfg["default_min_frame_size_in_deg"],
         dynamic_frame: bool = True,
         use_real_time: bool = True,
         output_file: str = "race_movie",
         final_zoomout: bool = True,
-        real_seconds_per_video_second: float = 150.0
-) -> None:
-    fig, writer = init_movie(output_file)
-    progress_counter = 0
-    nframes = 0
-    current_time_in_seconds = 0
-    routes_finished = [False] * len(routes)
-    routes_paused = [False] * len(routes)
-    previous_frame_index = [0] * len(routes)
-    current_subroutes = [route[0:1] for route in routes]
-    if use_real_time:
-        for route in routes:
-            if route.time[-1] / (real_seconds_per_video_second / cfg["frames_per_second"]) > nframes:
-                nframes = route.time[-1] / (real_seconds_per_video_second / cfg["frames_per_second"])
-    else:
-        for route in routes:
-            route.frame_step = get_frame_step_from_real_time(route, real_seconds_per_video_second)
-            if len(route.latitude) / route.frame_step > nframes:
-                nframes = int(len(route.latitude) / route.frame_step)
-
-    if not dynamic_frame:
-        extent = get_frame_extent_multiple(routes)
-    current_frame = 0
-    with writer.saving(fig, "output/" + output_file + ".mp4", cfg["video_dpi_resolution"]):
+        real_seconds_per_video_second: float = 150.0,
+        workers: int = 1,
+        quality: str = "final",
+        outputs: Optional[List[VideoOutput]] = None,
+) -> MovieStatistics:
+    with rendering_quality(quality):
+        current_time_in_seconds = 0
+        routes_finished = [False] * len(routes)
+        routes_paused = [False] * len(routes)
+        current_stops = [1] * len(routes)
+        frame_routes = list(routes)
+        if use_real_time:
+            # all routes are resampled once onto the common video frame timeline
+            frame_time_step = real_seconds_per_video_second / get_frames_per_second()
+            nframes = int(np.ceil(np.max([route.time[-1] for route in routes]) / frame_time_step))
+            frame_times = frame_time_step * np.arange(1, nframes + 1)
+            first_frames = []
+            routes_advancing = []
+            for route_id, route in enumerate(routes):
+                first_frame = int(np.searchsorted(frame_times, route.time[0]))
+                last_frame = int(np.searchsorted(frame_times, route.time[-1]))
+                frame_routes[route_id], advancing = resample_route(route, frame_times[first_frame:last_frame + 1])
+                first_frames.append(first_frame)
+                routes_advancing.append(advancing)
+        else:
+            for route in routes:
+                route.frame_step = get_frame_step_from_real_time(route, real_seconds_per_video_second)
+
+        extent = None
+        if not dynamic_frame:
+            extent = get_frame_extent_multiple(routes)
+        section = MovieSection(frame_routes, static_extent=extent, add_data=False, show_global_time=True)
+        current_frame = 0
         while False in routes_finished:
             current_frame += 1
             if use_real_time:
-                current_time_in_seconds += real_seconds_per_video_second / cfg["frames_per_second"]
-            routes_to_be_plotted = []
+                current_time_in_seconds += real_seconds_per_video_second / get_frames_per_second()
+            stops = [0] * len(routes)
             for route_id in range(len(routes)):
-                route = routes[route_id]
+                route = frame_routes[route_id]
                 if routes_finished[route_id]:
-                    routes_to_be_plotted.append(route)
+                    stops[route_id] = len(route)
                     routes_paused[route_id] = True
                     continue
                 if use_real_time:
-                    if route.time[0] > current_time_in_seconds:
+                    frame_index = current_frame - first_frames[route_id]
+                    if frame_index < 1:
                         routes_paused[route_id] = True
                         continue
-                    frame_index = np.searchsorted(route.time, current_time_in_seconds, side="left")
-                    routes_paused[route_id] = False
-                    if previous_frame_index[route_id] == frame_index:
-                        routes_paused[route_id] = True
-                    previous_frame_index[route_id] = frame_index
+                    routes_paused[route_id] = not routes_advancing[route_id][min(frame_index, len(route)) - 1]
                 else:
                     frame_index = current_frame * route.frame_step
                 if frame_index >= len(route):
                     routes_finished[route_id] = True
                 if frame_index > 0:
-                    current_subroutes[route_id] = route[0: frame_index]
-                routes_to_be_plotted.append(current_subroutes[route_id])
+                    current_stops[route_id] = min(frame_index, len(route))
+                stops[route_id] = current_stops[route_id]
             if False in routes_paused:
                 if dynamic_frame:
                     extent = get_dynamic_frame_extent_for_multiple_routes(
-                        routes_to_be_plotted, min_size_in_deg=min_map_frame_size_in_deg
-                    )
-                create_background_map(extent)
-                route_counter = 0
-                for subroute in routes_to_be_plotted:
-                    plot_frame(
-                        subroute,
-                        None,
-                        extent=extent,
-                        plot_background_map=False,
-                        add_data=False,
-                        zorder_modifier=2 * route_counter,
+                        [route.prefix(stop) for route, stop in zip(frame_routes, stops) if stop > 0],
+                        min_size_in_deg=min_map_frame_size_in_deg,
                     )
-                    del subroute
-                    route_counter += 1
-                plot_global_time(extent, current_time_in_seconds)
-                writer.grab_frame()
-                plt.clf()
-                progress_counter += 1
-            update_progress_bar(progress_counter, nframes, frame_step=1)
+                section.add_frame(stops, extent, current_time_in_seconds)
+        sections = [section]
         if final_zoomout:
-            print("\nRendering final zoomout")
-            initial_extent = extent
-            final_extent = get_frame_extent_multiple(routes)
-            progress_counter = 0
-            for i in range(cfg["movie_zoomout_seconds"] * cfg["frames_per_second"]):
-                current_extent = [
-                    initial_extent[j]
-                    + (float(i) / (cfg["movie_zoomout_seconds"] * cfg["frames_per_second"]))
-                    * (final_extent[j] - initial_extent[j])
-                    for j in range(len(initial_extent))
-                ]
-                create_background_map(current_extent)
-                route_counter = 0
-                for route in routes:
-                    plot_frame(
-                        route,
-                        None,
-                        extent=current_extent,
-                        plot_background_map=False,
-                        add_data=False,
-                        include_trail=False,
-                        zorder_modifier=2 * route_counter,
+            sections += get_final_zoomout_sections(routes, extent, get_frame_extent_multiple(routes), add_data=False)
+        return render_movie(sections, output_file, workers, quality, outputs)
+
+
+def get_final_zoomout_sections(
+        routes: Sequence[Route], initial_extent: List[float], final_extent: List[float], add_data: bool
+) -> List[MovieSection]:
+    # zoom out to the whole routes, then hold the final frame
+    zoomout = MovieSection(routes, add_data=add_data, include_trail=False, show_avg_speed=True)
+    stops = [len(route) for route in routes]
+    for i in range(cfg["movie_zoomout_seconds"] * get_frames_per_second()):
+        current_extent = [
+            initial_extent[j]
+            + (float(i) / (cfg["movie_zoomout_seconds"] * get_frames_per_second()))
+            * (final_extent[j] - initial_extent[j])
+            for j in range(len(initial_extent))
+        ]
+        zoomout.add_frame(stops, current_extent)
+    still = MovieSection(
+        routes, static_extent=final_extent, add_data=add_data, include_trail=False, show_avg_speed=True
+    )
+    for i in range(cfg["still_final_seconds"] * get_frames_per_second()):
+        still.add_frame(stops, final_extent)
+    return [zoomout, still]
+
+
+def render_movie(
+        sections: List[MovieSection],
+        output_file: str,
+        workers: int = 1,
+        quality: str = "final",
+        outputs: Optional[List[VideoOutput]] = None,
+) -> MovieStatistics:
+    # Renders the frames serially, or splits them into one contiguous chunk per worker process. Each chunk is
+    # encoded into its own video segment (and one per additional output) and the segments are joined without
+    # re-encoding.
+    nframes = sum(len(section) for section in sections)
+    output_path = "output/" + output_file + ".mp4"
+    outputs = get_configured_outputs() if outputs is None else outputs
+    workers = max(1, min(workers, nframes))
+    if workers == 1:
+        statistics = render_movie_segment(
+            sections, output_file, output_path, 0, nframes, show_progress=True, quality=quality, outputs=outputs
+        )
+    else:
+        statistics = MovieStatistics()
+        chunk_bounds = np.linspace(0, nframes, workers + 1).astype(int)
+        # e.g. a preview clip only needs the segments of its first seconds
+        segment_outputs = [
+            [output.get_segment(chunk_bounds[i] / get_frames_per_second()) for output in outputs]
+            for i in range(workers)
+        ]
+        with tempfile.TemporaryDirectory(dir="output") as segment_dir:
+            segment_files = [str(Path(segment_dir) / ("segment_%03i.mp4" % i)) for i in range(workers)]
+            with ProcessPoolExecutor(max_workers=workers, initializer=use_agg_backend) as executor:
+                futures = [
+                    executor.submit(
+                        render_movie_segment, sections, output_file, segment_file, chunk_bounds[i],
+                        chunk_bounds[i + 1], quality=quality,
+                        outputs=[output for output in segment_outputs[i] if output is not None],
                     )
-                    route_counter += 1
-                writer.grab_frame()
-                plt.clf()
-                progress_counter += 1
-                update_progress_bar(
-                    progress_counter,
-                    cfg["movie_zoomout_seconds"] * cfg["frames_per_second"]
-                    + cfg["still_final_seconds"] * cfg["frames_per_second"],
+                    for i, segment_file in enumerate(segment_files)
+                ]
+                for progress_counter, future in enumerate(as_completed(futures), 1):
+                    statistics.add(future.result())
+                    update_progress_bar(progress_counter, workers)
+            concat_videos(segment_files, output_path, metadata=get_movie_metadata(output_file))
+            for output_id, output in enumerate(outputs):
+                concat_videos(
+                    [output.get_path(segment_file) for segment_file, segment_output in
+                     zip(segment_files, segment_outputs) if segment_output[output_id] is not None],
+                    output.get_path(output_path),
+                    metadata=get_movie_metadata(output_file),
                 )
-            for i in range(cfg["still_final_seconds"] * cfg["frames_per_second"]):
-                create_background_map(final_extent)
-                route_counter = 0
-                for route in routes:
-                    plot_frame(
-                        route,
-                        None,
-                        extent=final_extent,
-                        plot_background_map=False,
-                        add_data=False,
-                        include_trail=False,
-                        zorder_modifier=2 * route_counter,
-                    )
-                    route_counter += 1
-                writer.grab_frame()
-                plt.clf()
+    print("")
+    statistics.print_report()
+    return statistics
+
+
+def render_movie_segment(
+        sections: List[MovieSection],
+        output_file: str,
+        segment_file: str,
+        first_frame: int,
+        last_frame: int,
+        show_progress: bool = False,
+        quality: str = "final",
+        outputs: Optional[List[VideoOutput]] = None,
+) -> MovieStatistics:
+    # renders the frames [first_frame, last_frame) of the movie into segment_file (and the additional outputs)
+    with rendering_quality(quality, report=show_progress):
+        return render_segment_frames(
+            sections, output_file, segment_file, first_frame, last_frame, show_progress, outputs)
+
+
+def render_segment_frames(
+        sections: List[MovieSection],
+        output_file: str,
+        segment_file: str,
+        first_frame: int,
+        last_frame: int,
+        show_progress: bool = False,
+        outputs: Optional[List[VideoOutput]] = None,
+) -> MovieStatistics:
+    fig, writer = init_movie(output_file, outputs)
+    statistics = MovieStatistics()
+    progress_counter = 0
+    section_start = 0
+    t0 = time.perf_counter()
+    with writer.saving(fig, segment_file, get_video_dpi()):
+        for section in sections:
+            start = max(first_frame - section_start, 0)
+            end = min(last_frame - section_start, len(section))
+            section_start += len(section)
+            if start >= end:
+                continue
+            plt.clf()
+            renderer = FrameRenderer(
+                fig,
+                section.routes,
+                writer.dpi,
+                static_extent=section.static_extent,
+                add_data=section.add_data,
+                show_global_time=section.show_global_time,
+            )
+            # the layout is fixed with the first frame of the section, so that all chunks of a movie match
+            render_frame(renderer, section, section.frames[0])
+            renderer.fix_layout()
+            # the artists of the renderer show this frame, it is not updated again if it is the first one written
+            updated_key = section.get_frame_key(section.frames[0])
+            previous_key = None
+            for frame in section.frames[start:end]:
+                frame_key = section.get_frame_key(frame)
+                if frame_key == previous_key:
+                    renderer.repeat_frame(writer)
+                    statistics.repeated_frames += 1
+                else:
+                    if frame_key != updated_key:
+                        render_frame(renderer, section, frame)
+                        updated_key = frame_key
+                    renderer.grab_frame(writer)
+                    statistics.rendered_frames += 1
+                previous_key = frame_key
                 progress_counter += 1
-                update_progress_bar(
-                    progress_counter,
-                    cfg["movie_zoomout_seconds"] * cfg["frames_per_second"]
-                    + cfg["still_final_seconds"] * cfg["frames_per_second"],
-                )
+                if show_progress:
+                    update_progress_bar(progress_counter, last_frame - first_frame)
+    statistics.render_time = time.perf_counter() - t0
+    statistics.add_writer_statistics(writer)
+    plt.close(fig)
+    return statistics
+
+
+def render_frame(renderer: FrameRenderer, section: MovieSection, frame: MovieFrame) -> None:
+    renderer.update(
+        section.get_subroutes(frame),
+        frame.extent,
+        include_trail=section.include_trail,
+        show_avg_speed=section.show_avg_speed,
+        current_time_in_seconds=frame.current_time_in_seconds,
+    )
+
+
+def get_frame_route(route: Route, real_seconds_per_video_second: float) -> Tuple[Route, np.ndarray]:
+    # One sample per video frame, and whether the route advanced in that frame (frames that are not advancing,
+    # i.e. during recording gaps, are skipped by the movie functions).
+    frame_time_step = real_seconds_per_video_second / get_frames_per_second()
+    if route.time[-1] <= route.time[0]:
+        print("Warning: no time data available, using a fixed frame step instead")
+        frame_route = route[::get_frame_step_from_real_time(route, real_seconds_per_video_second)]
+        # the segments now span several GPS points, speed is recomputed from them on access
+        frame_route.length_segments = np.diff(frame_route.length, prepend=frame_route.length[:1])
+        frame_route.time_intervals = frame_route.get_time_intervals()
+        frame_route.reset_columns(["speed"])
+        return frame_route, np.ones(len(frame_route), dtype=bool)
+    frame_times = np.arange(route.time[0], route.time[-1] + frame_time_step, frame_time_step)
+    return resample_route(route, frame_times)
 
 
 def get_frame_step_from_real_time(route: Route, real_seconds_per_video_second: float) -> int:
-    # note: this only works if the timestep is constant; an interpolation approach would be more general
+    # note: this only works if the timestep is constant, see get_frame_route for the general case
     try:
         frame_step = int(np.round(
             real_seconds_per_video_second
-            / (cfg["frames_per_second"] * route.avg_timestep)
+            / (get_frames_per_second() * route.avg_timestep)
         ))
     except OverflowError:
         print("Warning: failure to calculate optimal frame step - is time data missing?")
@@ -266,18 +444,3 @@ def update_progress_bar(progress_counter: int, nframes: int, frame_step: int = 1
         )
     )
     sys.stdout.flush()
-
-
-def plot_global_time(extent: List[float], current_time_in_seconds: int):
-    days = int(current_time_in_seconds / (24. * 60. * 60.))
-    hours = int((current_time_in_seconds - days * 24. * 60. * 60.) / (60. * 60.))
-    minutes = int((current_time_in_seconds - days * 24. * 60. * 60. - hours * 60. * 60.) / 60.)
-    plt.text(
-        extent[0] + 0.5 * (extent[1] - extent[0]),
-        extent[2] - 0.026 * (extent[3] - extent[2]),
-        "%i days %i hours %i minutes" % (days, hours, minutes),
-        color=cfg["text_color"],
-        transform=ccrs.PlateCarree(),
-        horizontalalignment="center",
-        fontsize=8
-    )
@@ -3,63 +3,297 @@ import matplotlib.pyplot as plt
 from matplotlib import colors
 from matplotlib.collections import LineCollection
 import cartopy.crs as ccrs
-from .route import Route
+from .route import Route, RouteLike, RouteView, get_rolling_speed, get_moving_average_speed
 from .config import get_yaml_config
 from .plotting import (
     get_frame_extent,
+    get_zoom_level_for_extent,
     create_background_map,
+    get_drawn_vertices,
     plot_route_on_map,
     add_data_to_bottom,
 )
-from typing import List
-import matplotlib.animation as mani
+from .hud import DataHud
+from .mosaic import get_map_image, project_to_mercator
+from .tile_cache import get_tile_source
+from .quality import get_frames_per_second
+from typing import Dict, List, Optional, Sequence
+from .frame_writer import FrameWriter
 
 cfg = get_yaml_config()
 
+trail_colormaps: Dict[tuple, colors.Colormap] = {}  # per route color, see get_trail_colormap
+
 
 def plot_frame(
-        route: Route,
-        ffmpeg_writer: mani.FFMpegWriter,
+        route: RouteLike,
+        ffmpeg_writer: FrameWriter,
         extent: List[float] = list(),
         plot_background_map: bool = True,
         add_data: bool = True,
-        speed_moving_window: int = 4 * cfg["frames_per_second"],
+        speed_moving_window: Optional[int] = None,
         include_trail: bool = True,
         zorder_modifier: int = 0,
         show_avg_speed: bool = False,
+        adjust_layout: bool = True,
 ) -> None:
     if len(extent) == 0:
         extent = get_frame_extent(route.full_route)
     if plot_background_map:
-        background_map = create_background_map(extent)
-    plot_route_on_map(route, False)
+        create_background_map(extent)
+    plot_route_on_map(route, False, extent=extent)
     if route.display_name is not None and route.display_name != "":
         plot_name_icon(route, zorder_modifier)
     if cfg["add_trail_to_movies"] and include_trail:
         plt.gca().add_collection(get_trail(route))
     if add_data:
-        if route.max_index > 1:
-            if not show_avg_speed:
-                speed = np.round(np.mean(route.speed[np.max([route.max_index - speed_moving_window, 0]):-1]))
-            else:
-                speed = np.mean(route.speed[route.speed > cfg["minimum_moving_speed"]])
-        else:
-            speed = 0
         add_data_to_bottom(
             extent,
             route.length[-1],
             route.altitude[-1],
             route.time[-1],
-            speed,
+            get_frame_speed(route, speed_moving_window, show_avg_speed),
         )
     plt.axis("off")
-    plt.tight_layout()
+    if adjust_layout:
+        plt.tight_layout()
     if ffmpeg_writer is not None:
         ffmpeg_writer.grab_frame()
         plt.clf()
 
 
-def plot_name_icon(route: Route, zorder_modifier: int = 0) -> None:
+def get_frame_speed(route: RouteLike, speed_moving_window: Optional[int], show_avg_speed: bool = False) -> float:
+    if route.max_index <= 1:
+        return 0
+    if show_avg_speed:
+        return get_moving_average_speed(route)
+    if speed_moving_window is None:  # 4 seconds of the video
+        speed_moving_window = 4 * get_frames_per_second()
+    return np.round(get_rolling_speed(route, speed_moving_window))
+
+
+def get_global_time_text(current_time_in_seconds: float) -> str:
+    days = int(current_time_in_seconds / (24. * 60. * 60.))
+    hours = int((current_time_in_seconds - days * 24. * 60. * 60.) / (60. * 60.))
+    minutes = int((current_time_in_seconds - days * 24. * 60. * 60. - hours * 60. * 60.) / 60.)
+    return "%i days %i hours %i minutes" % (days, hours, minutes)
+
+
+class StaticBackground(object):
+    # Map with a fixed extent that is rendered only once per movie. For every frame the rendered map is restored and
+    # only the artists plotted since the last frame (route, trail, icons, texts) are drawn on top of it. Use
+    # plot_frame with plot_background_map=False, adjust_layout=False and no writer, then grab_frame.
+    figure: plt.Figure
+    axes: plt.Axes
+    background: object = None
+    static_artists: set
+    layout_done: bool = False
+
+    def __init__(self, fig: plt.Figure, extent: List[float], dpi: float) -> None:
+        self.figure = fig
+        self.figure.set_dpi(dpi)  # the frames are rendered directly at the video resolution
+        self.axes = create_background_map(extent)
+        self.static_artists = set(self.axes.get_children())
+
+    def get_frame_artists(self) -> list:
+        return [artist for artist in self.axes.get_children() if artist not in self.static_artists]
+
+    def grab_frame(self, ffmpeg_writer: FrameWriter, frame_artists: Optional[list] = None) -> None:
+        # By default all artists added since the last frame are drawn and removed again afterwards. Persistent
+        # artists that are updated in place (see FrameRenderer) are passed explicitly instead.
+        remove_artists = frame_artists is None
+        if remove_artists:
+            frame_artists = self.get_frame_artists()
+        self.draw_frame(frame_artists)
+        ffmpeg_writer.write_frame(self.figure.canvas.buffer_rgba())
+        if remove_artists:
+            for artist in frame_artists:
+                artist.remove()
+
+    def draw_frame(self, frame_artists: list) -> None:
+        if self.background is None:
+            self.render_background(frame_artists)
+        self.figure.canvas.restore_region(self.background)
+        for artist in sorted(frame_artists, key=lambda artist: artist.get_zorder()):
+            self.axes.draw_artist(artist)
+
+    def render_background(self, frame_artists: list) -> None:
+        # the layout is fixed with the artists of the first frame, which are hidden while the map is rendered
+        if not self.layout_done:
+            plt.tight_layout()
+            self.layout_done = True
+        visible = [artist.get_visible() for artist in frame_artists]
+        for artist in frame_artists:
+            artist.set_visible(False)
+        self.figure.canvas.draw()  # also adds the map image to the axes
+        for artist, artist_visible in zip(frame_artists, visible):
+            artist.set_visible(artist_visible)
+        self.background = self.figure.canvas.copy_from_bbox(self.figure.bbox)
+        self.static_artists = set(self.axes.get_children()) - set(frame_artists)
+
+
+class FrameRenderer(object):
+    # All artists of the movie frames, created once and updated in place for every frame instead of rebuilding the
+    # figure: the map image, a line, trail and name icon per route, the data texts and the global time. The routes
+    # are projected once to the Mercator coordinates of the map axes. With a static extent the map is rendered only
+    # once (StaticBackground), otherwise the map image is cut out of the tiles for every frame (get_map_image). The
+    # texts below the map are composited into the frames by a rasterized DataHud.
+    figure: plt.Figure
+    axes: plt.Axes
+    routes: List[Route]
+    projected_routes: list
+    trail_segments: list
+    trail_colors: np.ndarray
+    static_background: Optional[StaticBackground] = None
+    map_image: object = None
+    route_lines: list
+    trails: list
+    name_icons: list
+    name_texts: list
+    hud: DataHud
+    data_texts: list
+    global_time_text: object = None
+    layout_done: bool = False
+
+    def __init__(
+            self,
+            fig: plt.Figure,
+            routes: Sequence[Route],
+            dpi: float,
+            static_extent: Optional[List[float]] = None,
+            add_data: bool = True,
+            show_global_time: bool = False,
+    ) -> None:
+        self.figure = fig
+        self.routes = list(routes)
+        self.tile_source = get_tile_source()
+        if static_extent is not None:
+            self.static_background = StaticBackground(fig, static_extent, dpi)
+            self.axes = self.static_background.axes
+        else:
+            self.figure.set_dpi(dpi)
+            self.axes = plt.axes(projection=self.tile_source.crs)
+            self.map_image = self.axes.imshow(np.full((1, 1, 3), 255, dtype=np.uint8), origin="upper")
+        self.axes.axis("off")
+        self.projected_routes = [project_to_mercator(route.longitude, route.latitude) for route in self.routes]
+        # every trail is a window of these segments, and its colors are a prefix of trail_colors
+        self.trail_segments = [get_segments(x, y) for x, y in self.projected_routes]
+        self.trail_colors = np.arange(get_trail_length(), dtype=float)
+        self.route_lines, self.trails, self.name_icons, self.name_texts = [], [], [], []
+        for route_id, route in enumerate(self.routes):
+            zorder_modifier = 2 * route_id
+            self.route_lines.append(self.axes.plot(
+                [], [], color=route.color, lw=cfg["route_thickness"], transform=self.axes.transData)[0])
+            trail = LineCollection(
+                [], lw=2, zorder=8, transform=self.axes.transData, cmap=get_trail_colormap(route.color))
+            self.trails.append(self.axes.add_collection(trail, autolim=False))
+            if route.display_name is not None and route.display_name != "":
+                self.name_icons.append(self.axes.scatter(
+                    [0.], [0.], 80 if len(route.display_name) <= 1 else 140, zorder=9 + zorder_modifier,
+                    transform=self.axes.transData, facecolor="w", edgecolor=route.color,
+                ))
+                self.name_texts.append(self.axes.text(
+                    0., 0., route.display_name, color=cfg["text_color"], fontsize="x-small",
+                    transform=self.axes.transData, zorder=10 + zorder_modifier,
+                    horizontalalignment="center", verticalalignment="center_baseline",
+                ))
+            else:
+                self.name_icons.append(None)
+                self.name_texts.append(None)
+        self.hud = DataHud(self.axes, add_data, show_global_time)
+        self.data_texts = self.hud.value_texts
+        self.global_time_text = self.hud.global_time_text
+
+    def update(
+            self,
+            subroutes: Sequence[Optional[RouteLike]],
+            extent: List[float],
+            include_trail: bool = True,
+            show_avg_speed: bool = False,
+            speed_moving_window: Optional[int] = None,
+            current_time_in_seconds: float = 0.,
+    ) -> None:
+        # subroutes are prefixes of the routes of the renderer, None for routes that are not shown
+        if self.static_background is None:
+            image, image_extent = get_map_image(self.tile_source, extent, get_zoom_level_for_extent(extent))
+            self.map_image.set_data(image)
+            self.map_image.set_extent(image_extent)
+            self.axes.set_extent(extent)
+        for route_id, subroute in enumerate(subroutes):
+            self.update_route(route_id, subroute, extent, include_trail)
+        if len(self.data_texts) > 0:
+            route = subroutes[0]
+            self.hud.set_data(route.length[-1], route.altitude[-1], route.time[-1],
+                              get_frame_speed(route, speed_moving_window, show_avg_speed))
+        if self.global_time_text is not None:
+            self.hud.set_global_time(get_global_time_text(current_time_in_seconds))
+
+    def update_route(
+            self, route_id: int, route: Optional[RouteLike], extent: List[float], include_trail: bool) -> None:
+        visible = route is not None and len(route) > 0
+        artists = [self.route_lines[route_id], self.trails[route_id], self.name_icons[route_id],
+                   self.name_texts[route_id]]
+        for artist in artists:
+            if artist is not None:
+                artist.set_visible(visible)
+        if not visible:
+            return
+        parent = route.route if isinstance(route, RouteView) else route
+        if parent is not self.routes[route_id]:
+            raise IOError("The frame renderer can only plot prefixes of its routes")
+        x, y = self.projected_routes[route_id]
+        n_points = len(route)
+        vertices = get_drawn_vertices(route, extent)
+        if vertices is None:
+            self.route_lines[route_id].set_data(x[:n_points], y[:n_points])
+        else:
+            self.route_lines[route_id].set_data(
+                np.where(vertices >= 0, x[vertices], np.nan), np.where(vertices >= 0, y[vertices], np.nan))
+        if self.name_icons[route_id] is not None:
+            self.name_icons[route_id].set_offsets([[x[n_points - 1], y[n_points - 1]]])
+            self.name_texts[route_id].set_position((x[n_points - 1], y[n_points - 1]))
+        trail = self.trails[route_id]
+        trail.set_visible(cfg["add_trail_to_movies"] and include_trail)
+        if trail.get_visible():
+            # the same points as get_trail
+            start = max(n_points - get_trail_length(), 0)
+            segments = self.trail_segments[route_id][start:max(n_points - 2, start)]
+            trail.set_segments(segments)
+            trail.set_array(self.trail_colors[:len(segments)])
+            if trail.get_clim()[1] != max(len(segments) - 1, 1):
+                trail.set_clim(0, max(len(segments) - 1, 1))
+
+    def get_frame_artists(self) -> list:
+        # without the HUD texts, which are composited into the rendered frame
+        artists = self.route_lines + self.trails
+        artists += [artist for artist in self.name_icons + self.name_texts if artist is not None]
+        return artists
+
+    def grab_frame(self, ffmpeg_writer: FrameWriter) -> None:
+        if not self.layout_done:
+            self.fix_layout()
+        if self.static_background is not None:
+            self.static_background.draw_frame(self.get_frame_artists())
+        else:
+            self.figure.canvas.draw()
+        frame = np.asarray(self.figure.canvas.buffer_rgba())
+        self.hud.composite(frame)
+        ffmpeg_writer.write_frame(frame)
+
+    def repeat_frame(self, ffmpeg_writer: FrameWriter) -> None:
+        # writes the last grabbed frame again, which is still in the canvas
+        ffmpeg_writer.write_frame(self.figure.canvas.buffer_rgba())
+
+    def fix_layout(self) -> None:
+        # computed once with the texts of the current frame and kept for all following frames
+        plt.tight_layout()
+        self.layout_done = True
+        if self.static_background is not None:
+            self.static_background.layout_done = True
+        self.hud.rasterize()
+
+
+def plot_name_icon(route: RouteLike, zorder_modifier: int = 0) -> None:
     icon_size = 80 if len(route.display_name) <= 1 else 140
     plt.scatter(
         route.longitude[-1],
@@ -84,10 +318,10 @@ def plot_name_icon(route: Route, zorder_modifier: int = 0) -> None:
 
 
 def get_dynamic_frame_extent_for_multiple_routes(
-        subroutes: List[Route], min_size_in_deg: float = cfg["default_min_frame_size_in_deg"]) -> List[float]:
+        subroutes: List[RouteLike], min_size_in_deg: float = cfg["default_min_frame_size_in_deg"]) -> List[float]:
     mean_point_between_routes = [0.0, 0.0]
     max_distance = min_size_in_deg
-    smoothing_window = np.min([cfg["frames_per_second"], np.min([sr.max_index for sr in subroutes])])
+    smoothing_window = np.min([get_frames_per_second(), np.min([sr.max_index for sr in subroutes])])
     for subroute in subroutes:
         mean_point_between_routes[0] += np.mean(subroute.longitude[-smoothing_window:]) / len(subroutes)
         mean_point_between_routes[1] += np.mean(subroute.latitude[-smoothing_window:]) / len(subroutes)
@@ -108,12 +342,32 @@ def get_dynamic_frame_extent_for_multiple_routes(
     ]
 
 
-def get_trail(route: Route, trail_width: int = 2) -> LineCollection:
-    trail_length = 2 * cfg["frames_per_second"]
+def get_trail(route: RouteLike, trail_width: int = 2) -> LineCollection:
+    trail_length = get_trail_length()
     alpha = np.arange(np.min([trail_length, route.max_index]))
-    colorfade = colors.to_rgb(route.color) + (0.0,)
-    cmap = colors.LinearSegmentedColormap.from_list("my", [colorfade, route.color])
-    points = np.vstack((route.longitude[-trail_length:-1], route.latitude[-trail_length:-1])).T.reshape(-1, 1, 2)
-    segments = np.hstack((points[:-1], points[1:]))
+    cmap = get_trail_colormap(route.color)
+    segments = get_segments(route.longitude[-trail_length:-1], route.latitude[-trail_length:-1])
     lc = LineCollection(segments, lw=trail_width, zorder=8, transform=ccrs.PlateCarree(), array=alpha, cmap=cmap)
     return lc
+
+
+def get_trail_length() -> int:
+    return 2 * get_frames_per_second()
+
+
+def get_segments(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    # The lines between consecutive points, shape (len(x) - 1, 2, 2), as a strided view into a single array of the
+    # points: slicing it for a trail copies nothing.
+    points = np.column_stack((x, y))
+    if len(points) < 2:
+        return np.zeros((0, 2, 2))
+    return np.lib.stride_tricks.sliding_window_view(points, 2, axis=0).swapaxes(1, 2)
+
+
+def get_trail_colormap(color: str) -> colors.Colormap:
+    # fades from transparent to the route color, created once per color
+    key = colors.to_rgba(color)
+    if key not in trail_colormaps:
+        colorfade = colors.to_rgb(color) + (0.0,)
+        trail_colormaps[key] = colors.LinearSegmentedColormap.from_list("my", [colorfade, color])
+    return trail_colormaps[key]
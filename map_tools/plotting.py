@@ -1,86 +1,96 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib import colors
 import cartopy.crs as ccrs
-import cartopy.io.img_tiles as img_tiles
-from .route import Route
+from .route import Route, RouteLike, get_moving_average_speed, get_total_moving_time
+from .simplify import get_simplified_indices
+from .spatial_index import get_visible_vertices
+from .tile_cache import get_tile_source
+from .hud import DataHud
+from .quality import rendering_quality, get_quality_tier, get_frames_per_second, get_image_dpi
 from .config import get_yaml_config
-from typing import List
+from typing import List, Optional, Sequence
 
 cfg = get_yaml_config()
 
 
 def plot_single_route(
-        route: Route,
+        route: RouteLike,
         extent: List[float] = [],
         color_segments: bool = False,
         output_file: str = "map",
+        quality: str = "final",
 ) -> None:
-    if len(extent) == 0:
-        extent = get_frame_extent(route.full_route)
-    create_background_map(extent)
-    plot_route_on_map(route, color_segments)
-    moving_filter = route.speed > cfg["minimum_moving_speed"]
-    if len(route.speed[moving_filter]) > 0:
-        avg_speed = np.mean(route.speed[moving_filter])
-        moving_time = np.sum(route.time_intervals[moving_filter])
-    else:
-        avg_speed = 0
-        moving_time = 0
-    add_data_to_bottom(
-        extent,
-        route.length[-1],
-        route.elevation_gain[-1],
-        moving_time,
-        avg_speed,
-    )
-    plt.axis("off")
-    plt.tight_layout()
-    if output_file != "":
-        plt.savefig("output/" + output_file, dpi=cfg["image_dpi_resolution"])
-    plt.clf()
+    with rendering_quality(quality):
+        if len(extent) == 0:
+            extent = get_frame_extent(route.full_route)
+        create_background_map(extent)
+        plot_route_on_map(route, color_segments, extent=extent)
+        add_data_to_bottom(
+            extent,
+            route.length[-1],
+            route.elevation_gain[-1],
+            get_total_moving_time(route),
+            get_moving_average_speed(route),
+        )
+        plt.axis("off")
+        plt.tight_layout()
+        if output_file != "":
+            plt.savefig("output/" + output_file, dpi=get_image_dpi())
+        plt.clf()
 
 
 def plot_multiple_routes(
-        routes: List[Route], extent: List[float] = [], output_file: str = "multi_map"
+        routes: Sequence[Route],
+        extent: List[float] = [],
+        output_file: str = "multi_map",
+        quality: str = "final",
 ) -> None:
-    if len(extent) == 0:
-        extent = get_frame_extent_multiple(routes)
-    create_background_map(extent)
-    total_length = 0
-    total_elevation = 0
-    total_time = 0
-    avg_speed = 0.
-    for route in routes:
-        plot_route_on_map(route, False)
-        total_length += route.length[-1]
-        total_elevation += route.elevation_gain[-1]
-        total_time += route.time[-1]
-        avg_speed += route.length[-1] * np.nan_to_num(np.mean(route.speed[route.speed > cfg["minimum_moving_speed"]]))
-    add_data_to_bottom(
-        extent,
-        total_length,
-        total_elevation,
-        total_time,
-        avg_speed / total_length,
-    )
-    plt.axis("off")
-    plt.tight_layout()
-    plt.savefig("output/" + output_file, dpi=cfg["image_dpi_resolution"])
-    plt.clf()
+    with rendering_quality(quality):
+        if len(extent) == 0:
+            extent = get_frame_extent_multiple(routes)
+        create_background_map(extent)
+        total_length = 0
+        total_elevation = 0
+        total_time = 0
+        avg_speed = 0.
+        for route in routes:
+            plot_route_on_map(route, False, extent=extent)
+            total_length += route.length[-1]
+            total_elevation += route.elevation_gain[-1]
+            total_time += route.time[-1]
+            avg_speed += route.length[-1] * get_moving_average_speed(route)
+        add_data_to_bottom(
+            extent,
+            total_length,
+            total_elevation,
+            total_time,
+            avg_speed / total_length,
+        )
+        plt.axis("off")
+        plt.tight_layout()
+        plt.savefig("output/" + output_file, dpi=get_image_dpi())
+        plt.clf()
 
 
 def get_zoom_level(delta: float) -> int:
     return int(
         np.clip(
-            np.round(np.log2((cfg["osm_zoom_level_adjust"] + 1.0) * 360.0 / delta)),
+            np.round(np.log2((cfg["osm_zoom_level_adjust"] + 1.0) * 360.0 / delta))
+            + get_quality_tier().zoom_level_offset,
             0,
             20,
         )
     )
 
 
+def get_zoom_level_for_extent(extent: List[float]) -> int:
+    deg_size = (extent[1] - extent[0]) / (1.0 + cfg["map_extent_adjust"])
+    return get_zoom_level(deg_size)
+
+
 def get_frame_extent(
-        route: Route,
+        route: RouteLike,
         fixed_shape: bool = True,
         fixed_size: float = 0.0,
         center_on: str = "frame",
@@ -107,7 +117,7 @@ def get_frame_extent(
         elif center_on == "last":
             center = [route.longitude[-1], route.latitude[-1]]
         elif center_on == "last_smooth":
-            smoothing_nframes = np.min([cfg["frames_per_second"], route.max_index])
+            smoothing_nframes = np.min([get_frames_per_second(), route.max_index])
             center = [np.mean(route.longitude[-smoothing_nframes:-1]),
                       np.mean(route.latitude[-smoothing_nframes:-1])]
         else:
@@ -121,7 +131,7 @@ def get_frame_extent(
     return extent
 
 
-def get_frame_extent_multiple(routes: List[Route], fixed_shape: bool = True) -> List[float]:
+def get_frame_extent_multiple(routes: Sequence[Route], fixed_shape: bool = True) -> List[float]:
     extent = [1000.0, -1000.0, 1000.0, -1000.0]
     for route in routes:
         current_extent = get_frame_extent(route, center_on="frame")
@@ -150,20 +160,23 @@ def get_frame_extent_multiple(routes: List[Route], fixed_shape: bool = True) ->
 
 
 def create_background_map(extent: List[float]) -> plt.Axes:
-    deg_size = (extent[1] - extent[0]) / (1.0 + cfg["map_extent_adjust"])
-    osm_request = img_tiles.OSM(cache=True)
+    osm_request = get_tile_source()
     ax = plt.axes(projection=osm_request.crs)
     ax.set_extent(extent)
-    ax.add_image(osm_request, get_zoom_level(deg_size))
+    ax.add_image(osm_request, get_zoom_level_for_extent(extent))
     return ax
 
 
-def plot_route_on_map(route: Route, color_segments: bool = False) -> None:
+def plot_route_on_map(
+        route: RouteLike,
+        color_segments: bool = False,
+        extent: List[float] = [],
+        simplify: bool = cfg["simplify_routes"],
+        cull_to_extent: bool = cfg["cull_routes_to_extent"],
+) -> None:
     if color_segments:
-        color_list = ["crimson", "g", "b"]
-        route_colors = list(
-            np.array(color_list)[route.route_segment_id.astype(int) % len(color_list)]
-        )
+        color_list = colors.to_rgba_array(["crimson", "g", "b"])
+        route_colors = color_list[route.route_segment_id.astype(int) % len(color_list)]
         plt.scatter(
             route.longitude,
             route.latitude,
@@ -174,91 +187,36 @@ def plot_route_on_map(route: Route, color_segments: bool = False) -> None:
             marker=".",
         )
     else:
+        vertices = get_drawn_vertices(route, extent, simplify, cull_to_extent)
+        if vertices is not None:
+            longitude = np.where(vertices >= 0, route.longitude[vertices], np.nan)
+            latitude = np.where(vertices >= 0, route.latitude[vertices], np.nan)
+        else:
+            longitude, latitude = route.longitude, route.latitude
         plt.plot(
-            route.longitude,
-            route.latitude,
+            longitude,
+            latitude,
             color=route.color,
             transform=ccrs.PlateCarree(),
             lw=cfg["route_thickness"],
         )
 
 
+def get_drawn_vertices(
+        route: RouteLike,
+        extent: List[float],
+        simplify: bool = cfg["simplify_routes"],
+        cull_to_extent: bool = cfg["cull_routes_to_extent"],
+) -> Optional[np.ndarray]:
+    # Indices of the vertices to draw (runs delimited by -1), or None to draw all of them. Drops the vertices that
+    # would not be visible at the map resolution or lie outside of the map.
+    if len(extent) == 0 or not (simplify or cull_to_extent):
+        return None
+    if cull_to_extent:
+        return get_visible_vertices(route, extent, get_zoom_level_for_extent(extent) if simplify else None)
+    return get_simplified_indices(route, get_zoom_level_for_extent(extent))
+
+
 def add_data_to_bottom(extent: List[float], distance: float, elevation_gain: float, time: float, speed: float) -> None:
-    plt.text(
-        extent[0] + 0.1 * (extent[1] - extent[0]),
-        extent[2] - 0.05 * (extent[3] - extent[2]),
-        "Distance",
-        color=cfg["text_color"],
-        transform=ccrs.PlateCarree(),
-        horizontalalignment="center",
-        fontsize=cfg["fontsize_small"],
-    )
-    plt.text(
-        extent[0] + 0.1 * (extent[1] - extent[0]),
-        extent[2] - 0.1 * (extent[3] - extent[2]),
-        "%3i km" %distance,
-        color=cfg["text_color"],
-        transform=ccrs.PlateCarree(),
-        horizontalalignment="center",
-        weight="bold",
-        fontsize=cfg["fontsize_large"],
-    )
-    plt.text(
-        extent[0] + 0.35 * (extent[1] - extent[0]),
-        extent[2] - 0.05 * (extent[3] - extent[2]),
-        "Elevation",
-        color=cfg["text_color"],
-        transform=ccrs.PlateCarree(),
-        horizontalalignment="center",
-        fontsize=cfg["fontsize_small"],
-    )
-    plt.text(
-        extent[0] + 0.35 * (extent[1] - extent[0]),
-        extent[2] - 0.1 * (extent[3] - extent[2]),
-        "%3i m" %elevation_gain,
-        color=cfg["text_color"],
-        transform=ccrs.PlateCarree(),
-        horizontalalignment="center",
-        weight="bold",
-        fontsize=cfg["fontsize_large"],
-    )
-    plt.text(
-        extent[0] + 0.65 * (extent[1] - extent[0]),
-        extent[2] - 0.05 * (extent[3] - extent[2]),
-        "Time",
-        color=cfg["text_color"],
-        transform=ccrs.PlateCarree(),
-        horizontalalignment="center",
-        fontsize=cfg["fontsize_small"],
-    )
-    hours = int(time/3600.)
-    minutes = int((time-3600*hours)/60)
-    plt.text(
-        extent[0] + 0.65 * (extent[1] - extent[0]),
-        extent[2] - 0.1 * (extent[3] - extent[2]),
-        "%ih%im" %(hours, minutes),
-        color=cfg["text_color"],
-        transform=ccrs.PlateCarree(),
-        horizontalalignment="center",
-        weight="bold",
-        fontsize=cfg["fontsize_large"],
-    )
-    plt.text(
-        extent[1] - 0.1 * (extent[1] - extent[0]),
-        extent[2] - 0.05 * (extent[3] - extent[2]),
-        "Speed",
-        color=cfg["text_color"],
-        transform=ccrs.PlateCarree(),
-        horizontalalignment="center",
-        fontsize=cfg["fontsize_small"],
-    )
-    plt.text(
-        extent[1] - 0.1 * (extent[1] - extent[0]),
-        extent[2] - 0.1 * (extent[3] - extent[2]),
-        "%.1f km/h" %np.round(speed, 1),
-        color=cfg["text_color"],
-        transform=ccrs.PlateCarree(),
-        horizontalalignment="center",
-        weight="bold",
-        fontsize=cfg["fontsize_large"],
-    )
+    # the texts are placed relative to the map axes, which cover the extent
+    DataHud(plt.gca()).set_data(distance, elevation_gain, time, speed)
@@ -0,0 +1,83 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from .config import get_yaml_config
+
+cfg = get_yaml_config()
+
+
+class QualityTier(object):
+    # Scaling of the resolution, the OSM zoom level (and with it the route simplification, which is done for the
+    # zoom level of the map) and the frame rate, see quality_tiers in config.yaml
+    name: str
+    dpi_scale: float
+    zoom_level_offset: int
+    fps_scale: float
+
+    def __init__(self, name: str) -> None:
+        if name not in cfg["quality_tiers"]:
+            raise IOError("Quality can only be %s" % ", ".join(cfg["quality_tiers"]))
+        settings = cfg["quality_tiers"][name]
+        self.name = name
+        self.dpi_scale = settings["dpi_scale"]
+        self.zoom_level_offset = settings["zoom_level_offset"]
+        self.fps_scale = settings["fps_scale"]
+
+
+class RenderTimes(object):
+    # rendering time per quality tier, summed over all plots and movies of the session
+    times: Dict[str, float]
+    counts: Dict[str, int]
+
+    def __init__(self) -> None:
+        self.times = {}
+        self.counts = {}
+
+    def add(self, quality: str, seconds: float) -> None:
+        self.times[quality] = self.times.get(quality, 0.) + seconds
+        self.counts[quality] = self.counts.get(quality, 0) + 1
+
+    def clear(self) -> None:
+        self.times = {}
+        self.counts = {}
+
+    def print_report(self) -> None:
+        for quality in self.times:
+            print("%s quality: %i renders, %.1f s" % (quality, self.counts[quality], self.times[quality]))
+
+
+render_times = RenderTimes()
+active_tier: Optional[QualityTier] = None  # set by rendering_quality
+
+
+@contextmanager
+def rendering_quality(quality: str, report: bool = True):
+    # Plots and movies rendered inside use the settings of this quality tier. Nested renders (e.g. the frames of a
+    # movie) are timed with the outermost one, worker processes don't report their part.
+    global active_tier
+    previous_tier, active_tier = active_tier, QualityTier(quality)
+    t0 = time.perf_counter()
+    try:
+        yield active_tier
+    finally:
+        active_tier = previous_tier
+    if previous_tier is None and report:
+        seconds = time.perf_counter() - t0
+        render_times.add(quality, seconds)
+        print("Rendered in %s quality in %.1f s" % (quality, seconds))
+
+
+def get_quality_tier() -> QualityTier:
+    return active_tier if active_tier is not None else QualityTier("final")
+
+
+def get_frames_per_second() -> int:
+    return max(int(round(cfg["frames_per_second"] * get_quality_tier().fps_scale)), 1)
+
+
+def get_video_dpi() -> float:
+    return cfg["video_dpi_resolution"] * get_quality_tier().dpi_scale
+
+
+def get_image_dpi() -> float:
+    return cfg["image_dpi_resolution"] * get_quality_tier().dpi_scale
@@ -1,25 +1,92 @@
 import numpy as np
-from datetime import datetime
+from typing import Dict, List, Sequence, Tuple, Union
 from .config import get_yaml_config
+from .gpx import read_gpx_file
+from .route_cache import get_cache_key, load_cached_route, store_cached_route
 
 cfg = get_yaml_config()
 
+route_columns = [
+    "latitude",
+    "longitude",
+    "altitude",
+    "time",
+    "length_segments",
+    "length",
+    "time_intervals",
+    "speed",
+    "avg_speed",
+    "elevation_gain",
+    "route_segment_id",
+    "speed_sum",
+    "moving_speed_sum",
+    "moving_count",
+    "moving_time",
+]
+# prefix sums behind the O(1) per-frame statistics (get_rolling_speed, get_moving_average_speed, get_moving_time);
+# they are only valid for prefixes and are recomputed after any other slicing
+statistics_columns = ["speed_sum", "moving_speed_sum", "moving_count", "moving_time"]
+column_index = {attr: i for i, attr in enumerate(route_columns)}
+column_getters = {
+    "length_segments": "get_length_segments",
+    "length": "get_length",
+    "time_intervals": "get_time_intervals",
+    "speed": "get_speed",
+    "avg_speed": "get_avg_speed",
+    "elevation_gain": "get_elevation_gain",
+    "route_segment_id": "get_route_segments",
+    "speed_sum": "get_speed_sum",
+    "moving_speed_sum": "get_moving_speed_sum",
+    "moving_count": "get_moving_count",
+    "moving_time": "get_moving_time",
+}
+cumulative_columns = [column_index[attr] for attr in ["time", "length", "elevation_gain"]]
+
+
+class RouteColumn(object):
+    # Named accessor for one row of the contiguous (n_columns, n_points) block that stores all route data
+    index: int
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.index = column_index[name]
+
+    def __get__(self, route: "Route", owner: type = None) -> np.ndarray:
+        if route is None:
+            return self
+        if not route.computed_columns[self.index]:
+            route.compute_column(self.index)
+        return route.data[self.index]
+
+    def __set__(self, route: "Route", value: np.ndarray) -> None:
+        route.data[self.index] = value
+        route.computed_columns[self.index] = True
+        route.simplification_cache.clear()
+        route.spatial_index_cache.clear()
+
 
 class Route(object):
     file: str
-    latitude: np.ndarray
-    longitude: np.ndarray
-    altitude: np.ndarray
-    time: np.ndarray
-    n_gps_entries: int
-    length_segments: np.ndarray
-    length: np.ndarray
-    time_intervals: np.ndarray
-    speed: np.ndarray
-    avg_speed: np.ndarray
-    elevation_gain: np.ndarray
-    max_index: int
-    route_segment_id: np.ndarray
+    data: np.ndarray
+    computed_columns: np.ndarray
+    simplification_cache: Dict[int, np.ndarray]
+    spatial_index_cache: Dict[int, object]
+    latitude = RouteColumn()
+    longitude = RouteColumn()
+    altitude = RouteColumn()
+    time = RouteColumn()
+    n_gps_entries: int = 0
+    length_segments = RouteColumn()
+    length = RouteColumn()
+    time_intervals = RouteColumn()
+    speed = RouteColumn()
+    avg_speed = RouteColumn()
+    elevation_gain = RouteColumn()
+    max_index: int = 0
+    route_segment_id = RouteColumn()
+    speed_sum = RouteColumn()
+    moving_speed_sum = RouteColumn()
+    moving_count = RouteColumn()
+    moving_time = RouteColumn()
     avg_timestep: int = 1
     full_route: "Route"
     color: str = cfg["default_route_color"]
@@ -33,44 +100,86 @@ class Route(object):
         display_name: str = "",
         time_delay: int = 0,
         auto_compress: bool = False,
+        use_cache: bool = cfg["use_route_cache"],
+        precision: str = cfg["route_precision"],
     ) -> None:
         self.full_route = self
         self.color = color
         self.display_name = display_name
+        self.file = file
+        self.set_data(np.zeros((len(route_columns), 0), dtype=precision))
         if len(file) > 0:
-            self.route_from_file(file, time_delay)
+            self.route_from_file(file, time_delay, use_cache)
             if auto_compress:
                 self.compress()
 
-    def route_from_file(self, file: str, time_delay: int = 0) -> None:
+    def route_from_file(self, file: str, time_delay: int = 0, use_cache: bool = cfg["use_route_cache"]) -> None:
         self.file = file
-        if file.endswith(".gpx"):
-            route_array, time_data_available = self.read_gpx()
-        else:
-            raise IOError("Only .gpx files are currently supported")
+        if not file.endswith((".gpx", ".gpx.gz")):
+            raise IOError("Only .gpx and .gpx.gz files are currently supported")
+        if use_cache:
+            cache_key = get_cache_key(file, time_delay, self.data.dtype.name)
+            cached_arrays = load_cached_route(cache_key)
+            if cached_arrays is not None:
+                self.route_from_arrays(cached_arrays)
+                return
+        route_array, time_data_available = self.read_gpx()
+        self.set_data(
+            np.zeros((len(route_columns), len(route_array)), dtype=self.data.dtype),
+            computed_columns=np.zeros(len(route_columns), dtype=bool),
+        )
         self.latitude = route_array[:, 0]
         self.longitude = route_array[:, 1]
         self.altitude = route_array[:, 2]
         self.time = route_array[:, 3] + time_delay
-        self.n_gps_entries = len(self.latitude)
-        self.length_segments = self.get_length_segments()
-        self.length = self.get_length()
+        # derived columns (length, speed, segments, ...) are computed on first access, see compute_column
         if time_data_available:
-            self.time_intervals = self.get_time_intervals()
-            self.speed = self.get_speed()
-            self.avg_speed = self.get_avg_speed()
-            self.avg_timestep = np.median(self.time_intervals)
+            self.avg_timestep = np.median(self.get_time_intervals())
         else:
-            self.speed = np.zeros(self.n_gps_entries)
-            self.avg_speed = self.speed
-            self.time_intervals = self.speed
             self.avg_timestep = 1
-        self.elevation_gain = self.get_elevation_gain()
-        self.max_index = len(self.latitude)
-        self.route_segment_id = self.get_route_segments()
+        if use_cache:
+            store_cached_route(cache_key, self.get_arrays())
+
+    def route_from_arrays(self, arrays: Dict[str, np.ndarray]) -> None:
+        # columns that were not computed when the arrays were stored are computed on first access again
+        computed_columns = arrays["computed_columns"].astype(bool)
+        data = np.zeros((len(route_columns), arrays["data"].shape[1]), dtype=self.data.dtype)
+        data[computed_columns] = arrays["data"]
+        self.set_data(data, computed_columns=computed_columns)
+        self.avg_timestep = float(arrays["avg_timestep"])
+
+    def get_arrays(self) -> Dict[str, np.ndarray]:
+        # only the computed columns, so that storing a route does not force the derived ones
+        return {
+            "data": self.data[self.computed_columns],
+            "computed_columns": self.computed_columns.copy(),
+            "avg_timestep": np.array(self.avg_timestep),
+        }
+
+    def set_data(self, data: np.ndarray, computed_columns: np.ndarray = None) -> None:
+        self.data = data
+        if computed_columns is None:
+            computed_columns = np.ones(len(route_columns), dtype=bool)
+        self.computed_columns = computed_columns
+        self.simplification_cache = {}  # simplified vertex indices per OSM zoom level, see simplify.py
+        self.spatial_index_cache = {}  # grid index over those vertices per zoom level, see spatial_index.py
+        self.n_gps_entries = data.shape[1]
+        self.max_index = self.n_gps_entries
+
+    def compute_column(self, index: int) -> None:
+        self.data[index] = getattr(self, column_getters[route_columns[index]])()
+        self.computed_columns[index] = True
+
+    def reset_columns(self, attrs: List[str]) -> None:
+        self.computed_columns[[column_index[attr] for attr in attrs]] = False
+
+    def compute_all_columns(self) -> None:
+        for index in np.flatnonzero(~self.computed_columns):
+            if not self.computed_columns[index]:  # may have been computed meanwhile as a dependency
+                self.compute_column(index)
 
     def __add__(self, other: "Route") -> "Route":
-        return add_routes(self, other)
+        return concat_routes([self, other])
 
     def get_length_segments(self) -> np.ndarray:
         lat_to_km = 110.574
@@ -103,64 +212,36 @@ class Route(object):
                          where=self.time_intervals != 0)
 
     def get_route_segments(self, minimum_speed_for_segment: float = 10.0) -> np.ndarray:
-        is_segment = np.zeros(self.n_gps_entries)
-        is_segment[self.speed > minimum_speed_for_segment] = 1
-        latest_id = 0
-        segment_id = np.zeros(self.n_gps_entries)
-        for i in range(self.n_gps_entries):
-            if is_segment[i]:
-                if i == 0 or not is_segment[i - 1]:
-                    latest_id += 1
-                segment_id[i] = latest_id
-        return segment_id
+        is_segment = self.speed > minimum_speed_for_segment
+        segment_start = is_segment.copy()
+        segment_start[1:] &= ~is_segment[:-1]
+        return np.cumsum(segment_start) * is_segment
+
+    def is_moving(self) -> np.ndarray:
+        return self.speed > cfg["minimum_moving_speed"]
+
+    def get_speed_sum(self) -> np.ndarray:
+        return np.cumsum(self.speed)
+
+    def get_moving_speed_sum(self) -> np.ndarray:
+        return np.cumsum(np.where(self.is_moving(), self.speed, 0.0))
+
+    def get_moving_count(self) -> np.ndarray:
+        return np.cumsum(self.is_moving())
+
+    def get_moving_time(self) -> np.ndarray:  # in s
+        return np.cumsum(np.where(self.is_moving(), self.time_intervals, 0.0))
 
     def read_gpx(self) -> (np.ndarray, bool):
-        with open(self.file) as f:
-            lines = f.readlines()
-            n_segments = " ".join(lines).count("</trkpt>")
-            route_array = np.zeros([n_segments, 4])
-            segment_counter = 0
-            time_data_available = False
-            for line in lines:
-                stripped_line = line.strip()
-                if stripped_line.startswith("<trkpt"):
-                    split_line = line.split("=")
-                    route_array[segment_counter, 0] = split_line[1][1:-5]  # latitude
-                    route_array[segment_counter, 1] = split_line[2][1:-3]  # longitude
-                elif stripped_line.startswith("<ele>"):
-                    route_array[segment_counter, 2] = stripped_line.strip(
-                        "<ele>"
-                    ).strip("</ele>")  # altitude
-                elif stripped_line.startswith("<time>"):
-                    time_data_available = True
-                    time_string = stripped_line.strip("<time>").strip("</time>")
-                    try:
-                        time = datetime.strptime(time_string, "%Y-%m-%dT%H:%M:%SZ")
-                    except ValueError:
-                        time = datetime.strptime(time_string, "%Y-%m-%dT%H:%M:%S.%fZ")
-                    if segment_counter == 0:
-                        start_time = time
-                    route_array[segment_counter, 3] = (
-                        time - start_time
-                    ).total_seconds()  # seconds since first segment
-                elif stripped_line.startswith("</trkpt>"):
-                    segment_counter = segment_counter + 1
-                else:
-                    continue
-        return route_array, time_data_available
+        return read_gpx_file(self.file)
 
     def __getitem__(self, key: slice) -> "Route":
+        self.compute_all_columns()
         new_route = Route()
         new_route.file = self.file
-        new_route.latitude = self.latitude[key]
-        new_route.longitude = self.longitude[key]
-        new_route.altitude = self.altitude[key]
-        new_route.time = self.time[key]
-        new_route.length = self.length[key]
-        new_route.speed = self.speed[key]
-        new_route.elevation_gain = self.elevation_gain[key]
+        new_route.set_data(np.array(self.data[:, key]))  # a copy, the statistics of the slice are recomputed
+        new_route.reset_columns(statistics_columns)
         new_route.full_route = self.full_route
-        new_route.max_index = len(new_route.latitude)
         new_route.avg_timestep = self.avg_timestep
         new_route.color = self.color
         new_route.display_name = self.display_name
@@ -168,7 +249,10 @@ class Route(object):
         return new_route
 
     def __len__(self) -> int:
-        return len(self.latitude)
+        return self.data.shape[1]
+
+    def prefix(self, stop: int) -> "RouteView":
+        return RouteView(self, stop)
 
     def set_color(self, color: str) -> None:
         self.color = color
@@ -186,63 +270,163 @@ class Route(object):
             factor = self.calculate_compression_factor(real_seconds_per_video_second)
             print("Auto-compressing by factor ", factor)
         if factor > 1:
-            for attr in [
-                "latitude",
-                "longitude",
-                "altitude",
-                "length_segments",
-                "time_intervals",
-                "speed",
-                "avg_speed",
-                "route_segment_id",
-                "time",
-                "length",
-                "elevation_gain",
-            ]:
-                setattr(
-                    self,
-                    attr,
-                    getattr(self, attr)[::factor]
-                )
-            self.n_gps_entries = len(self.latitude)
-            self.max_index = self.n_gps_entries
+            self.compute_all_columns()
+            self.set_data(np.ascontiguousarray(self.data[:, ::factor]))
             self.time_intervals = self.get_time_intervals()
             self.length_segments = self.get_length_segments()
             self.avg_timestep = np.median(self.time_intervals)
             self.frame_step = self.frame_step
+            self.reset_columns(statistics_columns)
         else:
             print("No route compression possible for " + self.file)
 
 
+def prefix_column(attr: str) -> property:
+    index = column_index[attr]
+    return property(lambda self: self.route.data[index, :self.max_index])
+
+
+def parent_attribute(attr: str) -> property:
+    return property(lambda self: getattr(self.route, attr))
+
+
+class RouteView(object):
+    # Read-only view of the first max_index points of a route, used for the per-frame subroutes of movies.
+    # Creating it copies nothing; the column attributes are NumPy views into the parent arrays.
+    __slots__ = ("route", "max_index")
+    route: Route
+    max_index: int
+
+    def __init__(self, route: Route, stop: int) -> None:
+        route.compute_all_columns()
+        self.route = route
+        self.max_index = max(0, min(int(stop), len(route)))
+
+    latitude = prefix_column("latitude")
+    longitude = prefix_column("longitude")
+    altitude = prefix_column("altitude")
+    time = prefix_column("time")
+    length_segments = prefix_column("length_segments")
+    length = prefix_column("length")
+    time_intervals = prefix_column("time_intervals")
+    speed = prefix_column("speed")
+    avg_speed = prefix_column("avg_speed")
+    elevation_gain = prefix_column("elevation_gain")
+    route_segment_id = prefix_column("route_segment_id")
+    speed_sum = prefix_column("speed_sum")
+    moving_speed_sum = prefix_column("moving_speed_sum")
+    moving_count = prefix_column("moving_count")
+    moving_time = prefix_column("moving_time")
+    data = property(lambda self: self.route.data[:, :self.max_index])
+    full_route = parent_attribute("full_route")
+    file = parent_attribute("file")
+    color = parent_attribute("color")
+    display_name = parent_attribute("display_name")
+    avg_timestep = parent_attribute("avg_timestep")
+    frame_step = parent_attribute("frame_step")
+
+    @property
+    def n_gps_entries(self) -> int:
+        return self.max_index
+
+    def __len__(self) -> int:
+        return self.max_index
+
+    def prefix(self, stop: int) -> "RouteView":
+        return RouteView(self.route, min(stop, self.max_index))
+
+
+RouteLike = Union[Route, RouteView]
+
+
+def get_rolling_speed(route: RouteLike, window: int) -> float:
+    # mean speed of the points [n - window, n - 1), i.e. the moving window shown while a movie is running
+    end = len(route) - 1
+    start = max(end + 1 - window, 0)
+    if end <= start:
+        return 0.
+    speed_sum = route.speed_sum
+    return (speed_sum[end - 1] - (speed_sum[start - 1] if start > 0 else 0.)) / (end - start)
+
+
+def get_moving_average_speed(route: RouteLike) -> float:
+    # mean speed of all points faster than minimum_moving_speed
+    if len(route) == 0 or route.moving_count[-1] == 0:
+        return 0.
+    return route.moving_speed_sum[-1] / route.moving_count[-1]
+
+
+def get_total_moving_time(route: RouteLike) -> float:  # in s
+    if len(route) == 0:
+        return 0.
+    return route.moving_time[-1]
+
+
 def add_routes(route1: Route, route2: Route) -> Route:
-    new_route = Route()
-    for attr in [
-        "latitude",
-        "longitude",
-        "altitude",
-        "length_segments",
-        "time_intervals",
-        "speed",
-        "avg_speed",
-        "route_segment_id",
-    ]:
-        setattr(
-            new_route,
-            attr,
-            np.concatenate((getattr(route1, attr), getattr(route2, attr))),
-        )
-    for attr in ["time", "length", "elevation_gain"]:
-        setattr(
-            new_route,
-            attr,
-            np.concatenate(
-                (
-                    getattr(route1, attr),
-                    getattr(route1, attr)[-1] + getattr(route2, attr),
-                )
-            ),
-        )
-    for attr in ["n_gps_entries", "max_index"]:
-        setattr(new_route, attr, getattr(route1, attr) + getattr(route2, attr))
-    new_route.file = route1.file
+    return concat_routes([route1, route2])
+
+
+def concat_routes(routes: Sequence[Route]) -> Route:
+    # Joins the routes one after the other into a single preallocated block. Time, length and elevation gain
+    # continue from the end of the previous route, and segment ids are shifted to stay unique.
+    if len(routes) == 0:
+        raise IOError("At least one route is needed for joining")
+    for route in routes:
+        route.compute_all_columns()
+    dtype = np.result_type(*[route.data for route in routes])
+    data = np.empty((len(route_columns), sum(len(route) for route in routes)), dtype=dtype)
+    segment_row = column_index["route_segment_id"]
+    cumulative_offset = np.zeros((len(cumulative_columns), 1), dtype=dtype)
+    segment_offset = 0
+    start = 0
+    for route in routes:
+        end = start + len(route)
+        data[:, start:end] = route.data
+        data[cumulative_columns, start:end] += cumulative_offset
+        segment_ids = data[segment_row, start:end]
+        segment_ids[segment_ids > 0] += segment_offset
+        if end > start:
+            cumulative_offset = data[cumulative_columns, end - 1:end].copy()
+            segment_offset = max(segment_offset, np.max(segment_ids))
+        start = end
+    new_route = Route(color=routes[0].color, display_name=routes[0].display_name, precision=dtype.name)
+    new_route.file = routes[0].file
+    new_route.set_data(data)
+    new_route.time_intervals = new_route.get_time_intervals()
+    new_route.reset_columns(statistics_columns)
+    if len(new_route) > 1 and new_route.time[-1] > new_route.time[0]:
+        new_route.avg_timestep = np.median(new_route.time_intervals)
     return new_route
+
+
+def resample_route(
+        route: Route, times: np.ndarray, max_gap: float = cfg["max_interpolation_gap_seconds"]
+) -> Tuple[Route, np.ndarray]:
+    # Interpolates all columns of the route at the given times in one pass over the column block.
+    # Inside recording gaps longer than max_gap the route is held at the last point before the gap.
+    # Also returns for each sample whether the route advanced, i.e. it was interpolated or passed a new GPS point.
+    route.compute_all_columns()
+    times = np.asarray(times, dtype=np.float64)
+    upper = np.clip(np.searchsorted(route.time, times, side="right"), 1, max(len(route) - 1, 1))
+    lower = np.maximum(upper - 1, 0)
+    upper = np.minimum(upper, len(route) - 1)
+    interval = route.time[upper] - route.time[lower]
+    held = (interval > max_gap) & (times < route.time[upper])
+    weight = np.divide(times - route.time[lower], interval, out=np.zeros_like(times), where=interval > 0)
+    weight = np.clip(weight, 0., 1.)
+    weight[held] = 0.
+    data = route.data[:, lower] + weight * (route.data[:, upper] - route.data[:, lower])
+    data[column_index["route_segment_id"]] = route.route_segment_id[lower]
+    new_route = Route(color=route.color, display_name=route.display_name, precision=route.data.dtype.name)
+    new_route.file = route.file
+    new_route.set_data(data.astype(route.data.dtype, copy=False))
+    new_route.time = times
+    new_route.length_segments = np.diff(new_route.length, prepend=new_route.length[:1])
+    new_route.time_intervals = np.diff(new_route.time, prepend=new_route.time[:1])
+    new_route.reset_columns(statistics_columns)
+    if len(times) > 1:
+        new_route.avg_timestep = np.median(new_route.time_intervals[1:])
+    passed_points = np.searchsorted(route.time, times, side="left")
+    advancing = np.diff(passed_points, prepend=-1) > 0
+    advancing |= ~held
+    return new_route, advancing
@@ -0,0 +1,91 @@
+import os
+import hashlib
+import zipfile
+import numpy as np
+from pathlib import Path
+from typing import Dict, Optional
+from .config import get_yaml_config
+
+cfg = get_yaml_config()
+
+# Bump whenever the parser or the derived quantities change, so that stale entries are never loaded
+CACHE_VERSION = 4
+
+
+def get_cache_dir() -> Path:
+    return Path(os.path.expanduser(cfg["route_cache_dir"]))
+
+
+def get_cache_key(file: str, time_delay: int = 0, precision: str = "float64") -> str:
+    # the precision is part of the key, a float64 route must not be loaded from float32 data
+    file_hash = hashlib.sha1()
+    with open(file, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            file_hash.update(chunk)
+    file_hash.update(("v%i_delay%s_%s" % (CACHE_VERSION, time_delay, precision)).encode())
+    return file_hash.hexdigest()
+
+
+def load_cached_route(key: str, cache_dir: Optional[Path] = None) -> Optional[Dict[str, np.ndarray]]:
+    cache_file = (cache_dir or get_cache_dir()) / (key + ".npz")
+    if not cache_file.exists():
+        return None
+    try:
+        with np.load(cache_file) as data:
+            arrays = {name: data[name] for name in data.files}
+    except (OSError, ValueError, zipfile.BadZipFile):
+        print("Warning: discarding unreadable route cache entry " + str(cache_file))
+        cache_file.unlink(missing_ok=True)
+        return None
+    try:
+        os.utime(cache_file)  # mark as recently used for the LRU eviction
+    except OSError:  # e.g. a read-only cache
+        pass
+    return arrays
+
+
+def store_cached_route(
+        key: str,
+        arrays: Dict[str, np.ndarray],
+        cache_dir: Optional[Path] = None,
+        max_size_mb: Optional[float] = None,
+) -> None:
+    # a route that can't be cached (read-only or full disk, ...) is still loaded, only without the cache
+    cache_dir = cache_dir or get_cache_dir()
+    cache_file = cache_dir / (key + ".npz")
+    # write to a temporary file first so that concurrent readers never see a partial entry
+    temporary_file = cache_dir / (key + ".%i.tmp" % os.getpid())
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(temporary_file, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(temporary_file, cache_file)
+    except OSError as error:
+        print("Warning: could not write the route cache entry %s: %s" % (cache_file, error))
+        try:
+            temporary_file.unlink(missing_ok=True)
+        except OSError:
+            pass
+        return
+    evict_cache(cache_dir, cfg["route_cache_max_size_mb"] if max_size_mb is None else max_size_mb)
+
+
+def evict_cache(cache_dir: Optional[Path] = None, max_size_mb: float = cfg["route_cache_max_size_mb"]) -> None:
+    cache_dir = cache_dir or get_cache_dir()
+    entries = []
+    for cache_file in cache_dir.glob("*.npz"):
+        try:
+            stat = cache_file.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, cache_file))
+    total_size = sum(entry[1] for entry in entries)
+    for _, size, cache_file in sorted(entries):
+        if total_size <= max_size_mb * 1e6:
+            break
+        cache_file.unlink(missing_ok=True)
+        total_size -= size
+
+
+def clear_route_cache(cache_dir: Optional[Path] = None) -> None:
+    evict_cache(cache_dir, max_size_mb=0.)
@@ -0,0 +1,93 @@
+import os
+import time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from .route import Route
+from .config import get_yaml_config
+
+cfg = get_yaml_config()
+
+
+def load_route_timed(file: str, use_cache: bool = cfg["use_route_cache"]) -> Tuple[Optional[Route], float, str]:
+    t0 = time.perf_counter()
+    try:
+        route = Route(file, use_cache=use_cache)
+        error = ""
+    except Exception as e:  # a single broken file should not abort loading the whole library
+        route = None
+        error = "%s: %s" % (type(e).__name__, e)
+    return route, time.perf_counter() - t0, error
+
+
+def get_file_size(file: str) -> int:
+    try:
+        return os.path.getsize(file)
+    except OSError:
+        return 0
+
+
+class RouteLibrary(object):
+    files: List[str]
+    routes: List[Route]
+    load_times: Dict[str, float]
+    failures: Dict[str, str]
+    total_load_time: float = 0.
+
+    def __init__(
+            self,
+            files: List[str],
+            workers: Optional[int] = None,
+            use_cache: bool = cfg["use_route_cache"],
+    ) -> None:
+        self.files = []
+        self.routes = []
+        self.load_times = {}
+        self.failures = {}
+        t0 = time.perf_counter()
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(files)))
+        if workers == 1:
+            results = [load_route_timed(file, use_cache) for file in files]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # submit the largest files first so that they do not end up as stragglers
+                futures = {
+                    file: executor.submit(load_route_timed, file, use_cache)
+                    for file in sorted(files, key=get_file_size, reverse=True)
+                }
+                results = [futures[file].result() for file in files]
+        for file, (route, load_time, error) in zip(files, results):
+            self.load_times[file] = load_time
+            if route is None:
+                self.failures[file] = error
+            else:
+                self.files.append(file)
+                self.routes.append(route)
+        self.total_load_time = time.perf_counter() - t0
+
+    def __len__(self) -> int:
+        return len(self.routes)
+
+    def __getitem__(self, key: int) -> Route:
+        return self.routes[key]
+
+    def __iter__(self) -> Iterator[Route]:
+        return iter(self.routes)
+
+    def print_report(self) -> None:
+        for file, load_time in self.load_times.items():
+            status = "FAILED (" + self.failures[file] + ")" if file in self.failures else "ok"
+            print("%-50s %8.1f ms  %s" % (file, 1e3 * load_time, status))
+        print("Loaded %i routes (%i failed) in %.2f s" % (len(self.routes), len(self.failures), self.total_load_time))
+
+
+def load_routes(
+        directory: str,
+        workers: Optional[int] = None,
+        pattern: str = "*.gpx",
+        use_cache: bool = cfg["use_route_cache"],
+) -> RouteLibrary:
+    files = sorted(str(path) for path in Path(directory).glob(pattern))
+    return RouteLibrary(files, workers=workers, use_cache=use_cache)
@@ -0,0 +1,74 @@
+import numpy as np
+from .route import RouteView, RouteLike
+from .config import get_yaml_config
+
+cfg = get_yaml_config()
+
+
+def get_pixel_size_in_deg(zoom_level: int) -> float:
+    return 360.0 / (256 * 2 ** zoom_level)  # width of one OSM tile pixel
+
+
+def to_mercator_deg(longitude: np.ndarray, latitude: np.ndarray) -> (np.ndarray, np.ndarray):
+    # Web Mercator scaled to degrees of longitude, so that distances match the map pixels at every latitude
+    return longitude, np.degrees(np.log(np.tan(np.pi / 4.0 + np.radians(latitude) / 2.0)))
+
+
+def simplify_polyline(x: np.ndarray, y: np.ndarray, tolerance: float) -> np.ndarray:
+    # Douglas-Peucker, processing all open segments of one recursion level at once.
+    # Returns the sorted indices of the vertices to keep.
+    n_points = len(x)
+    if n_points < 3:
+        return np.arange(n_points)
+    keep = np.zeros(n_points, dtype=bool)
+    keep[[0, -1]] = True
+    settled = keep.copy()
+    while True:
+        candidates = np.flatnonzero(~settled)
+        if len(candidates) == 0:
+            break
+        kept = np.flatnonzero(keep)
+        segment = np.searchsorted(kept, candidates) - 1
+        start, end = kept[segment], kept[segment + 1]
+        distance = get_segment_distance(x[candidates], y[candidates], x[start], y[start], x[end], y[end])
+        group_starts = np.flatnonzero(np.diff(segment, prepend=-1))
+        group_max = np.maximum.reduceat(distance, group_starts)
+        group_sizes = np.diff(np.append(group_starts, len(candidates)))
+        is_group_max = distance == np.repeat(group_max, group_sizes)
+        max_positions = np.flatnonzero(is_group_max)
+        _, first_max = np.unique(segment[max_positions], return_index=True)
+        split_points = candidates[max_positions[first_max]]
+        split_needed = group_max > tolerance
+        keep[split_points[split_needed]] = True
+        settled[split_points[split_needed]] = True
+        settled[candidates[~np.repeat(split_needed, group_sizes)]] = True
+    return np.flatnonzero(keep)
+
+
+def get_segment_distance(
+        x: np.ndarray, y: np.ndarray, x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray
+) -> np.ndarray:
+    dx = x1 - x0
+    dy = y1 - y0
+    squared_length = dx ** 2 + dy ** 2
+    projection = np.divide((x - x0) * dx + (y - y0) * dy, squared_length,
+                           out=np.zeros_like(x), where=squared_length > 0)
+    projection = np.clip(projection, 0.0, 1.0)
+    return np.hypot(x - (x0 + projection * dx), y - (y0 + projection * dy))
+
+
+def get_simplified_indices(route: RouteLike, zoom_level: int) -> np.ndarray:
+    if isinstance(route, RouteView):
+        # Prefix of the simplification of the parent route, ending at the current point. This approximates the
+        # simplification of the prefix itself: the last kept segment, from the last vertex before the current point
+        # to the current point, may deviate up to about twice the tolerance from the points in between.
+        indices = get_simplified_indices(route.route, zoom_level)
+        indices = indices[:np.searchsorted(indices, route.max_index)]
+        if route.max_index > 0 and (len(indices) == 0 or indices[-1] != route.max_index - 1):
+            indices = np.append(indices, route.max_index - 1)
+        return indices
+    if zoom_level not in route.simplification_cache:
+        x, y = to_mercator_deg(route.longitude, route.latitude)
+        tolerance = cfg["simplification_tolerance_pixels"] * get_pixel_size_in_deg(zoom_level)
+        route.simplification_cache[zoom_level] = simplify_polyline(x, y, tolerance)
+    return route.simplification_cache[zoom_level]
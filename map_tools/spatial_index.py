@@ -0,0 +1,120 @@
+import numpy as np
+from typing import List, Optional
+from .route import Route, RouteView, RouteLike
+from .simplify import get_simplified_indices
+from .config import get_yaml_config
+
+cfg = get_yaml_config()
+
+
+class GridIndex(object):
+    # Uniform grid over a set of boxes (or points). Every box is registered in all cells it overlaps, and the box
+    # indices are stored sorted by cell (CSR layout), so the boxes of one row of cells are a single contiguous slice.
+    x0: float
+    y0: float
+    cell_size: float
+    nx: int
+    ny: int
+    items: np.ndarray
+    cell_start: np.ndarray
+
+    def __init__(
+            self,
+            x: np.ndarray,
+            y: np.ndarray,
+            cells_per_axis: int = cfg["spatial_index_cells_per_axis"],
+            x_max: Optional[np.ndarray] = None,
+            y_max: Optional[np.ndarray] = None,
+    ):
+        # boxes from x, y to x_max, y_max, points if those are not given
+        x_max = x if x_max is None else x_max
+        y_max = y if y_max is None else y_max
+        if len(x) == 0:
+            self.x0, self.y0 = 0., 0.
+        else:
+            self.x0, self.y0 = np.min(x), np.min(y)
+        self.cell_size = max(np.max(x_max, initial=self.x0) - self.x0, np.max(y_max, initial=self.y0) - self.y0, 1e-9)
+        self.cell_size /= cells_per_axis
+        ix_min, iy_min = self.get_cell(x, y)
+        ix_max, iy_max = self.get_cell(x_max, y_max)
+        self.nx, self.ny = int(np.max(ix_max, initial=0)) + 1, int(np.max(iy_max, initial=0)) + 1
+        # one entry per box and overlapped cell
+        box_width = ix_max - ix_min + 1
+        counts = box_width * (iy_max - iy_min + 1)
+        items = np.repeat(np.arange(len(x)), counts)
+        offsets = np.arange(len(items)) - np.repeat(np.cumsum(counts) - counts, counts)
+        cell = (iy_min[items] + offsets // box_width[items]) * self.nx + ix_min[items] + offsets % box_width[items]
+        order = np.argsort(cell, kind="stable")
+        self.items = items[order]
+        self.cell_start = np.searchsorted(cell[order], np.arange(self.nx * self.ny + 1))
+
+    def get_cell(self, x: np.ndarray, y: np.ndarray) -> (np.ndarray, np.ndarray):
+        return (
+            np.floor((np.asarray(x) - self.x0) / self.cell_size).astype(int),
+            np.floor((np.asarray(y) - self.y0) / self.cell_size).astype(int),
+        )
+
+    def query(self, extent: List[float]) -> np.ndarray:
+        # sorted indices of the boxes in all cells that overlap the extent [x_min, x_max, y_min, y_max]
+        (ix_min, ix_max), (iy_min, iy_max) = self.get_cell(extent[:2], extent[2:])
+        ix_min, ix_max = max(ix_min, 0), min(ix_max, self.nx - 1)
+        iy_min, iy_max = max(iy_min, 0), min(iy_max, self.ny - 1)
+        if ix_min > ix_max or iy_min > iy_max:
+            return np.zeros(0, dtype=int)
+        rows = np.arange(iy_min, iy_max + 1) * self.nx
+        starts = self.cell_start[rows + ix_min]
+        ends = self.cell_start[rows + ix_max + 1]
+        return np.unique(np.concatenate([self.items[start:end] for start, end in zip(starts, ends)]))
+
+
+class SegmentIndex(object):
+    # The vertices a route is drawn with at one zoom level, and a grid over the bounding boxes of the segments
+    # between consecutive vertices
+    vertices: np.ndarray
+    grid: GridIndex
+
+    def __init__(self, route: Route, vertices: np.ndarray) -> None:
+        self.vertices = vertices
+        x, y = route.longitude[vertices], route.latitude[vertices]
+        self.grid = GridIndex(
+            np.minimum(x[:-1], x[1:]), np.minimum(y[:-1], y[1:]),
+            x_max=np.maximum(x[:-1], x[1:]), y_max=np.maximum(y[:-1], y[1:]),
+        )
+
+
+def get_segment_index(route: Route, zoom_level: Optional[int]) -> SegmentIndex:
+    # zoom level None indexes all points of the route
+    if zoom_level not in route.spatial_index_cache:
+        vertices = np.arange(len(route)) if zoom_level is None else get_simplified_indices(route, zoom_level)
+        route.spatial_index_cache[zoom_level] = SegmentIndex(route, vertices)
+    return route.spatial_index_cache[zoom_level]
+
+
+def get_visible_vertices(route: RouteLike, extent: List[float], zoom_level: Optional[int] = None) -> np.ndarray:
+    # Indices of the route vertices needed to draw the part of the route inside the extent, simplified for the
+    # zoom level if one is given: the end points of all segments whose bounding box overlaps the extent. Separate
+    # runs of vertices are delimited by -1.
+    if isinstance(route, RouteView):
+        parent, stop = route.route, route.max_index
+    else:
+        parent, stop = route, len(route)
+    if stop == 0:
+        return np.zeros(0, dtype=int)
+    index = get_segment_index(parent, zoom_level)
+    vertices = index.vertices
+    n_vertices = int(np.searchsorted(vertices, stop))
+    n_drawable = n_vertices
+    segments = index.grid.query(extent)
+    if n_vertices == 0 or vertices[n_vertices - 1] != stop - 1:
+        # the current point of a prefix view is not a vertex of the full route simplification, it ends the last
+        # segment instead of the next vertex
+        n_drawable += 1
+        if n_vertices > 0:
+            segments = np.append(segments, n_vertices - 1)
+    segments = segments[segments + 1 < n_drawable]
+    positions = np.unique(np.concatenate((segments, segments + 1)))
+    if n_drawable == 1:
+        positions = np.zeros(1, dtype=int)
+    drawn_vertices = np.where(positions < n_vertices, vertices[np.minimum(positions, len(vertices) - 1)], stop - 1)
+    breaks = np.flatnonzero(np.diff(positions) > 1) + 1
+    return np.insert(drawn_vertices, breaks, -1)
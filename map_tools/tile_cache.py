@@ -0,0 +1,147 @@
+import io
+import threading
+import numpy as np
+import cartopy.io.img_tiles as img_tiles
+from PIL import Image
+from collections import Counter, OrderedDict
+from typing import Hashable, Optional
+from .config import get_yaml_config
+from .tile_store import TileStore
+
+cfg = get_yaml_config()
+
+
+class TileCache(object):
+    # LRU cache of decoded images with a byte budget. Tiles are fetched from several threads by cartopy,
+    # hence the lock.
+    max_bytes: int
+    size_bytes: int = 0
+    entries: OrderedDict
+    hits: Counter
+    misses: Counter
+    evictions: int = 0
+
+    def __init__(self, max_size_mb: float = cfg["tile_cache_max_size_mb"]) -> None:
+        self.max_bytes = int(max_size_mb * 1e6)
+        self.entries = OrderedDict()
+        self.hits = Counter()
+        self.misses = Counter()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: Hashable, kind: str = "tile") -> Optional[object]:
+        with self.lock:
+            if key not in self.entries:
+                self.misses[kind] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits[kind] += 1
+            return self.entries[key][0]
+
+    def put(self, key: Hashable, value: object, size_bytes: int) -> None:
+        with self.lock:
+            if key in self.entries:
+                self.size_bytes -= self.entries.pop(key)[1]
+            if size_bytes > self.max_bytes:
+                return
+            self.entries[key] = (value, size_bytes)
+            self.size_bytes += size_bytes
+            while self.size_bytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.size_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.size_bytes = 0
+            self.hits.clear()
+            self.misses.clear()
+            self.evictions = 0
+
+    def print_report(self) -> None:
+        for kind in sorted(set(self.hits) | set(self.misses)):
+            requests = self.hits[kind] + self.misses[kind]
+            print("%-8s %8i hits %8i misses (%.1f %% hit rate)"
+                  % (kind, self.hits[kind], self.misses[kind], 100. * self.hits[kind] / requests))
+        print("%i entries, %.1f of %.1f MB used, %i evictions"
+              % (len(self.entries), self.size_bytes / 1e6, self.max_bytes / 1e6, self.evictions))
+
+
+tile_cache = TileCache()
+
+
+class CachedOSM(img_tiles.OSM):
+    # OSM tiles that are decoded once per process. The merged image of all tiles of a map is cached as well, so
+    # that frames with the same extent (e.g. static map movies) skip the tile merging too. The images are already
+    # in the Mercator projection of the map axes, so cartopy does not need to reproject them.
+    memory_cache: TileCache
+
+    def __init__(self, memory_cache: TileCache = tile_cache) -> None:
+        super().__init__(cache=True)
+        self.memory_cache = memory_cache
+
+    @property
+    def _cache_dir(self):
+        # share the disk tile cache of img_tiles.OSM
+        return self.cache_path / "OSM"
+
+    def get_image(self, tile):
+        key = ("tile",) + tuple(tile)
+        image = self.memory_cache.get(key, "tile")
+        if image is None:
+            image = np.array(self.load_image(tile))
+            image.setflags(write=False)
+            self.memory_cache.put(key, image, image.nbytes)
+        return image, self.tileextent(tile), "lower"
+
+    def load_image(self, tile) -> Image.Image:
+        return super().get_image(tile)[0]
+
+    def image_for_domain(self, target_domain, target_z):
+        key = ("mosaic", target_z) + tuple(self.find_images(target_domain, target_z))
+        mosaic = self.memory_cache.get(key, "mosaic")
+        if mosaic is None:
+            mosaic = super().image_for_domain(target_domain, target_z)
+            self.memory_cache.put(key, mosaic, mosaic[0].nbytes)
+        return mosaic
+
+
+class OfflineOSM(CachedOSM):
+    # OSM tiles read from a local TileStore only, see tile_prefetch for filling the store. Tiles that were not
+    # prefetched are rendered blank instead of being downloaded.
+    store: TileStore
+    missing_tiles: set
+
+    def __init__(self, store: Optional[TileStore] = None, memory_cache: TileCache = tile_cache) -> None:
+        super().__init__(memory_cache)
+        if store is None:
+            store = TileStore()
+        self.store = store
+        self.missing_tiles = set()
+
+    def load_image(self, tile) -> Image.Image:
+        data = self.store.get(tuple(tile))
+        if data is None:
+            if tuple(tile) not in self.missing_tiles:
+                print("Warning: tile %s is not in the offline tile store %s" % (tuple(tile), self.store.path))
+                self.missing_tiles.add(tuple(tile))
+            return Image.new(self.desired_tile_form or "RGB", (256, 256), "white")
+        image = Image.open(io.BytesIO(data))
+        # desired_tile_form is None in newer cartopy versions, which keep the mode of the tile files
+        if self.desired_tile_form is not None:
+            image = image.convert(self.desired_tile_form)
+        return image
+
+
+tile_source = None
+
+
+def get_tile_source() -> CachedOSM:
+    # a single tile source for all plots, so that the disk tile cache is only scanned once
+    global tile_source
+    if tile_source is None:
+        tile_source = OfflineOSM() if cfg["offline_tiles"] else CachedOSM()
+    return tile_source
@@ -0,0 +1,95 @@
+import argparse
+import time
+import urllib.error
+import urllib.request
+import numpy as np
+from typing import List, Optional, Sequence
+from .config import get_yaml_config
+from .plotting import get_frame_extent, get_zoom_level_for_extent
+from .route import Route, RouteLike
+from .tile_store import Tile, TileStore, get_tile_x, get_tile_y
+
+cfg = get_yaml_config()
+
+user_agent = "map_tools tile prefetch"
+
+
+def get_route_zoom_levels(
+        route: RouteLike, map_frame_size_in_deg: float = cfg["default_min_frame_size_in_deg"]) -> List[int]:
+    # zoom levels from the map of the whole route (static movies, final zoomout) to the dynamic map frame
+    full_zoom = get_zoom_level_for_extent(get_frame_extent(route.full_route))
+    frame_zoom = get_zoom_level_for_extent(get_frame_extent(route, fixed_size=map_frame_size_in_deg, center_on="last"))
+    return list(range(min(full_zoom, frame_zoom), max(full_zoom, frame_zoom) + 1))
+
+
+def get_corridor_tiles(route: RouteLike, zoom: int) -> List[Tile]:
+    # All tiles that a map frame at this zoom level can show while centered on a point of the route. The largest
+    # frame size that get_zoom_level rounds to this zoom level is used as margin around the route.
+    frame_size = np.sqrt(2.) * (cfg["osm_zoom_level_adjust"] + 1.0) * 360.0 / 2 ** zoom
+    lon_margin = 0.5 * frame_size * (1.0 + cfg["map_extent_adjust"])
+    lat_margin = 0.5 * lon_margin
+    x_min = get_tile_x(route.longitude - lon_margin, zoom)
+    x_max = get_tile_x(route.longitude + lon_margin, zoom)
+    y_min = get_tile_y(route.latitude + lat_margin, zoom)
+    y_max = get_tile_y(route.latitude - lat_margin, zoom)
+    tiles = set()
+    for dx in range(np.max(x_max - x_min) + 1):
+        for dy in range(np.max(y_max - y_min) + 1):
+            inside = (x_min + dx <= x_max) & (y_min + dy <= y_max)
+            tiles.update(zip((x_min + dx)[inside].tolist(), (y_min + dy)[inside].tolist()))
+    return [(x, y, zoom) for x, y in sorted(tiles)]
+
+
+def download_tile(tile: Tile, url: str = cfg["tile_server_url"]) -> bytes:
+    x, y, z = tile
+    request = urllib.request.Request(url.format(x=x, y=y, z=z), headers={"User-Agent": user_agent})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+def prefetch_route(
+        route: RouteLike,
+        zoom_levels: Optional[Sequence[int]] = None,
+        store: Optional[TileStore] = None,
+        url: str = cfg["tile_server_url"],
+        batch_size: int = 100,
+) -> int:
+    # Downloads the tiles along the route corridor that are not in the store yet and returns their number.
+    if store is None:
+        store = TileStore()
+    if zoom_levels is None:
+        zoom_levels = get_route_zoom_levels(route)
+    tiles = [tile for zoom in zoom_levels for tile in get_corridor_tiles(route, zoom) if tile not in store]
+    print("Prefetching %i tiles at zoom levels %s into %s" % (len(tiles), list(zoom_levels), store.path))
+    downloaded = []
+    n_downloaded = 0
+    for tile in tiles:
+        try:
+            downloaded.append((tile, download_tile(tile, url)))
+        except (urllib.error.URLError, OSError) as error:
+            print("Warning: could not download tile %s: %s" % (tile, error))
+            continue
+        n_downloaded += 1
+        if len(downloaded) >= batch_size:
+            store.put_many(downloaded)
+            downloaded = []
+    store.put_many(downloaded)
+    return n_downloaded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill the offline tile store along the corridor of routes")
+    parser.add_argument("route_files", nargs="+")
+    parser.add_argument("--zoom", type=int, nargs="*", help="zoom levels, default: see get_route_zoom_levels")
+    parser.add_argument("--frame-size", type=float, default=cfg["default_min_frame_size_in_deg"],
+                        help="map_frame_size_in_deg of the dynamic map movies")
+    parser.add_argument("--import-directory", help="import a {z}/{x}/{y}.png tile directory before downloading")
+    args = parser.parse_args()
+    t0 = time.time()
+    tile_store = TileStore()
+    if args.import_directory:
+        print("Imported %i tiles" % tile_store.import_directory(args.import_directory))
+    for route_file in args.route_files:
+        route = Route(route_file)
+        prefetch_route(route, args.zoom or get_route_zoom_levels(route, args.frame_size), tile_store)
+    print("%i tiles in the store, finished in %.1f seconds" % (len(tile_store), time.time() - t0))
@@ -0,0 +1,89 @@
+import os
+import sqlite3
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+from .config import get_yaml_config
+
+cfg = get_yaml_config()
+
+Tile = Tuple[int, int, int]  # (x, y, zoom) as in cartopy.io.img_tiles
+
+
+def get_store_path() -> Path:
+    return Path(os.path.expanduser(cfg["tile_store_path"]))
+
+
+class TileStore(object):
+    # Local map tiles in an MBTiles file (SQLite), so that maps can be rendered without network access. Rows are
+    # stored in the TMS scheme of the MBTiles specification, tile arguments use the XYZ scheme of the OSM servers.
+    path: Path
+    connection: sqlite3.Connection
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = Path(path or get_store_path())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # cartopy requests the tiles of a map from several threads
+        self.connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT)")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, "
+                "tile_data BLOB, PRIMARY KEY (zoom_level, tile_column, tile_row))"
+            )
+            self.connection.execute("INSERT OR IGNORE INTO metadata VALUES ('name', 'map_tools'), ('format', 'png')")
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+
+    def __contains__(self, tile: Tile) -> bool:
+        return self.get(tile) is not None
+
+    def get(self, tile: Tile) -> Optional[bytes]:
+        x, y, z = tile
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (z, x, (1 << z) - 1 - y),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def put(self, tile: Tile, data: bytes) -> None:
+        self.put_many([(tile, data)])
+
+    def put_many(self, tiles: Iterable[Tuple[Tile, bytes]]) -> None:
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)",
+                [(z, x, (1 << z) - 1 - y, sqlite3.Binary(data)) for (x, y, z), data in tiles],
+            )
+
+    def import_directory(self, directory: str) -> int:
+        # imports a {z}/{x}/{y}.png tile pyramid, e.g. the disk cache of another tile downloader
+        tiles = []
+        for tile_file in Path(directory).glob("*/*/*.png"):
+            try:
+                tile = (int(tile_file.parent.name), int(tile_file.stem), int(tile_file.parent.parent.name))
+            except ValueError:
+                continue
+            tiles.append((tile, tile_file.read_bytes()))
+        self.put_many(tiles)
+        return len(tiles)
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def get_tile_x(longitude: np.ndarray, zoom: int) -> np.ndarray:
+    n_tiles = 1 << zoom
+    return np.clip(np.floor((np.asarray(longitude) + 180.) / 360. * n_tiles), 0, n_tiles - 1).astype(int)
+
+
+def get_tile_y(latitude: np.ndarray, zoom: int) -> np.ndarray:
+    n_tiles = 1 << zoom
+    latitude = np.radians(np.clip(latitude, -85.0511, 85.0511))
+    y = (1. - np.arcsinh(np.tan(latitude)) / np.pi) / 2. * n_tiles
+    return np.clip(np.floor(y), 0, n_tiles - 1).astype(int)
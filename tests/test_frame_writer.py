@@ -0,0 +1,116 @@
+from map_tools.frame_writer import *
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+@unittest.skipIf(shutil.which("ffmpeg") is None, "ffmpeg is not installed")
+class TestFrameWriter(unittest.TestCase):
+
+    def test_write_frames(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            fig = plt.figure(figsize=(3.01, 2.))
+            writer = FrameWriter(fps=10, ffmpeg_path="ffmpeg")
+            with writer.saving(fig, str(Path(output_dir) / "test.mp4"), 50):
+                self.assertEqual(writer.frame_size, (150, 100))
+                for i in range(3):
+                    plt.plot([0, i], [0, 1])
+                    writer.grab_frame()
+            self.assertEqual(writer.nframes, 3)
+            self.assertGreater((Path(output_dir) / "test.mp4").stat().st_size, 0)
+            plt.close(fig)
+
+    def test_frame_size_mismatch(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            fig = plt.figure(figsize=(2., 2.))
+            writer = FrameWriter(fps=10, ffmpeg_path="ffmpeg")
+            with writer.saving(fig, str(Path(output_dir) / "test.mp4"), 50):
+                writer.grab_frame()
+                with self.assertRaises(IOError):
+                    writer.write_frame(bytes(4 * 10 * 10))
+            plt.close(fig)
+
+    def test_concat_videos(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            fig = plt.figure(figsize=(2., 2.))
+            segment_files = [str(Path(output_dir) / ("segment_%i.mp4" % i)) for i in range(2)]
+            for segment_file in segment_files:
+                writer = FrameWriter(fps=10, ffmpeg_path="ffmpeg")
+                with writer.saving(fig, segment_file, 50):
+                    for i in range(3):
+                        writer.grab_frame()
+            concat_videos(segment_files, str(Path(output_dir) / "joined.mp4"), ffmpeg_path="ffmpeg")
+            self.assertGreater((Path(output_dir) / "joined.mp4").stat().st_size, 0)
+            plt.close(fig)
+
+    def test_queued_frames(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            fig = plt.figure(figsize=(2., 2.))
+            writer = FrameWriter(fps=10, ffmpeg_path="ffmpeg", queue_size=2)
+            with writer.saving(fig, str(Path(output_dir) / "test.mp4"), 50):
+                for i in range(10):
+                    plt.plot([0, i], [0, 1])
+                    writer.grab_frame()
+                self.assertLessEqual(writer.max_queue_depth, 2)
+            self.assertEqual(writer.writer_thread, None)
+            self.assertEqual(writer.nframes, 10)
+            self.assertGreater((Path(output_dir) / "test.mp4").stat().st_size, 0)
+            plt.close(fig)
+
+    def test_multiple_outputs(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            fig = plt.figure(figsize=(4., 2.))
+            outputs = [VideoOutput("_small", height=50), VideoOutput("_clip", max_seconds=0.5)]
+            writer = FrameWriter(fps=10, ffmpeg_path="ffmpeg", outputs=outputs)
+            with writer.saving(fig, str(Path(output_dir) / "test.mp4"), 50):
+                for i in range(20):
+                    plt.plot([0, i], [0, 1])
+                    writer.grab_frame()
+            for name in ["test.mp4", "test_small.mp4", "test_clip.mp4"]:
+                self.assertGreater((Path(output_dir) / name).stat().st_size, 0)
+            plt.close(fig)
+
+
+class TestVideoOutput(unittest.TestCase):
+
+    def test_output_command(self):
+        output = VideoOutput("_preview", height=360, max_seconds=15)
+        self.assertEqual(output.get_path("movie.mp4"), "movie_preview.mp4")
+        writer = FrameWriter(fps=10, ffmpeg_path="ffmpeg", outputs=[output])
+        command = writer.get_command("movie.mp4")
+        self.assertEqual(command.count("-vcodec"), 3)  # the raw input and two outputs
+        self.assertEqual(command[command.index("-vf") + 1], "scale=-2:360")
+        self.assertLess(command.index("movie.mp4"), command.index("-vf"))
+        self.assertEqual(command[-1], "movie_preview.mp4")
+
+    def test_segment_outputs(self):
+        output = VideoOutput("_preview", max_seconds=15)
+        self.assertEqual(output.get_segment(10.).max_seconds, 5.)
+        self.assertEqual(output.get_segment(15.), None)
+        output = VideoOutput("_720p", height=720)
+        self.assertIs(output.get_segment(100.), output)
+
+
+@unittest.skipIf(os.name == "nt", "the fake ffmpeg is a script")
+class TestFfmpegErrors(unittest.TestCase):
+
+    def test_verbose_failure(self):
+        # more error output than fits into a pipe, written before the frames are read
+        with tempfile.TemporaryDirectory() as output_dir:
+            fake_ffmpeg = Path(output_dir) / "ffmpeg"
+            fake_ffmpeg.write_text("#!%s\nimport sys\nsys.stderr.write(200000 * 'x' + 'error')\nsys.stderr.flush()\n"
+                                   "sys.stdin.buffer.read()\nsys.exit(1)\n" % sys.executable)
+            fake_ffmpeg.chmod(0o755)
+            fig = plt.figure(figsize=(2., 2.))
+            writer = FrameWriter(fps=10, ffmpeg_path=str(fake_ffmpeg), queue_size=0)
+            with self.assertRaisesRegex(IOError, "exit code 1: x+error"):
+                with writer.saving(fig, str(Path(output_dir) / "test.mp4"), 50):
+                    for i in range(10):
+                        writer.grab_frame()
+            plt.close(fig)
+
+
+if __name__ == '__main__':
+    unittest.main()
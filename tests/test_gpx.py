@@ -0,0 +1,65 @@
+from map_tools.gpx import *
+import gzip
+import tempfile
+import unittest
+
+gpx_buffer = b"""<?xml version="1.0" encoding="UTF-8"?>
+<gpx version="1.1">
+ <metadata>
+  <time>2024-05-20T05:40:00Z</time>
+ </metadata>
+ <trk>
+  <trkseg>
+   <trkpt lat="48.2492630" lon="11.6511160">
+    <ele>482.7</ele>
+    <time>2024-05-20T05:46:28Z</time>
+   </trkpt>
+   <trkpt lat="48.2492210" lon="11.6511660">
+    <ele>482.5</ele>
+    <time>2024-05-20T05:47:33.500Z</time>
+   </trkpt>
+   <trkpt lat="48.2491790" lon="11.6512150"></trkpt>
+  </trkseg>
+ </trk>
+</gpx>
+"""
+
+
+class TestGpxParsing(unittest.TestCase):
+
+    def test_parse_buffer(self):
+        route_array, time_data_available = parse_gpx(gpx_buffer)
+        self.assertEqual(route_array.shape, (3, 4))
+        self.assertEqual(time_data_available, True)
+        self.assertAlmostEqual(route_array[1, 0], 48.2492210)
+        self.assertAlmostEqual(route_array[1, 1], 11.6511660)
+        self.assertAlmostEqual(route_array[1, 2], 482.5)
+        self.assertAlmostEqual(route_array[1, 3], 65.5)
+        self.assertEqual(route_array[2, 2], 0.)
+
+    def test_read_file(self):
+        route_array, time_data_available = read_gpx_file("../route_files/Erding_Whirlpool.gpx")
+        self.assertEqual(len(route_array), 2533)
+        self.assertEqual(route_array[0, 3], 0.)
+        self.assertEqual(np.all(np.diff(route_array[:, 3]) >= 0), True)
+
+    def test_chunked_and_gzip_reading(self):
+        route_array, _ = read_gpx_file("../route_files/Erding_Whirlpool.gpx")
+        chunked_array, _ = read_gpx_file("../route_files/Erding_Whirlpool.gpx", chunk_size=1000)
+        self.assertEqual(np.array_equal(route_array, chunked_array), True)
+        with tempfile.TemporaryDirectory() as directory:
+            gzip_file = directory + "/route.gpx.gz"
+            with gzip.open(gzip_file, "wb") as f, open("../route_files/Erding_Whirlpool.gpx", "rb") as source:
+                f.write(source.read())
+            gzip_array, _ = read_gpx_file(gzip_file, chunk_size=1000)
+        self.assertEqual(np.array_equal(route_array, gzip_array), True)
+
+    def test_growable_array(self):
+        array = GrowableArray(np.float64, initial_capacity=2)
+        for i in range(5):
+            array.extend(np.arange(3) + 3 * i)
+        self.assertEqual(np.array_equal(array.to_array(), np.arange(15)), True)
+
+
+if __name__ == '__main__':
+    unittest.main()
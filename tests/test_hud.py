@@ -0,0 +1,45 @@
+from map_tools.hud import *
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import unittest
+
+
+def get_ink_box(frame: np.ndarray) -> list:
+    rows, columns = np.nonzero(frame[:, :, :3].min(axis=2) < 128)
+    return [rows.min(), rows.max(), columns.min(), columns.max()]
+
+
+class TestHud(unittest.TestCase):
+
+    def test_glyph_cache(self):
+        glyphs = GlyphCache(FontProperties(size=12, weight="bold"), 100)
+        digit, advance = glyphs.get("0")
+        self.assertGreater(advance, 0)
+        self.assertGreater(digit.coverage.max(), 0.5)
+        self.assertIs(glyphs.get("0")[0], digit)
+        space, space_advance = glyphs.get(" ")
+        self.assertEqual(space.coverage.size, 0)
+        self.assertGreater(space_advance, 0)
+
+    def test_composite(self):
+        # the composited texts cover about the same pixels as the texts drawn by matplotlib
+        fig = plt.figure(figsize=(4., 3.), dpi=100)
+        FigureCanvasAgg(fig)
+        ax = fig.add_axes([0.1, 0.3, 0.8, 0.6])
+        ax.axis("off")
+        hud = DataHud(ax, show_global_time=True)
+        hud.set_data(42., 512., 5400., 23.4)
+        hud.set_global_time("1 days 2 hours 3 minutes")
+        fig.canvas.draw()
+        drawn = np.array(fig.canvas.buffer_rgba())
+        hud.rasterize()
+        fig.canvas.draw()
+        frame = np.asarray(fig.canvas.buffer_rgba())
+        self.assertEqual(np.any(frame[:, :, :3] < 128), False)
+        hud.composite(frame)
+        for drawn_edge, composited_edge in zip(get_ink_box(drawn), get_ink_box(frame)):
+            self.assertLessEqual(abs(int(drawn_edge) - int(composited_edge)), 2)
+        plt.close(fig)
+
+
+if __name__ == '__main__':
+    unittest.main()
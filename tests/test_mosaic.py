@@ -0,0 +1,42 @@
+from map_tools.mosaic import *
+from map_tools.plotting import get_frame_extent
+from map_tools.route import Route
+import cartopy.crs as ccrs
+import unittest
+
+route = Route("../route_files/Erding_Whirlpool.gpx")
+
+
+class NumberedTiles(object):
+    # tile source whose tiles are filled with their column number
+    crs = ccrs.Mercator.GOOGLE
+
+    def get_image(self, tile):
+        return np.full((256, 256, 3), tile[0] % 256, dtype=np.uint8), None, "lower"
+
+
+class TestMosaic(unittest.TestCase):
+
+    def test_projected_route(self):
+        x, y = project_to_mercator(route.longitude, route.latitude)
+        projected = ccrs.Mercator.GOOGLE.transform_points(ccrs.PlateCarree(), route.longitude, route.latitude)
+        self.assertLess(np.max(np.abs(x - projected[:, 0])), 1e-3)
+        self.assertLess(np.max(np.abs(y - projected[:, 1])), 1e-3)
+
+    def test_map_image(self):
+        extent = get_frame_extent(route.prefix(10), fixed_size=0.1, center_on="last")
+        image, image_extent = get_map_image(NumberedTiles(), extent, 12)
+        x, y = get_global_pixels(extent[:2], [extent[3], extent[2]], 12)
+        self.assertEqual(image.shape[1], int(np.ceil(x[1])) - int(np.floor(x[0])))
+        self.assertEqual(image[0, 0, 0], int(np.floor(x[0])) // 256 % 256)
+        self.assertEqual(image[0, -1, 0], (int(np.ceil(x[1])) - 1) // 256 % 256)
+        corners = ccrs.Mercator.GOOGLE.transform_points(
+            ccrs.PlateCarree(), np.array(extent[:2]), np.array([extent[2], extent[3]]))
+        self.assertLessEqual(image_extent[0], corners[0, 0])
+        self.assertGreaterEqual(image_extent[1], corners[1, 0])
+        self.assertLessEqual(image_extent[2], corners[0, 1])
+        self.assertGreaterEqual(image_extent[3], corners[1, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
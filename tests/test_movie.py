@@ -0,0 +1,51 @@
+from map_tools.movie import *
+import unittest
+
+route = Route("../route_files/Erding_Whirlpool.gpx")
+route2 = Route("../route_files/Garching_Seefeld.gpx")
+
+
+class TestMovie(unittest.TestCase):
+
+    def test_section_subroutes(self):
+        section = MovieSection([route, route2])
+        section.add_frame([10, 0], get_frame_extent(route))
+        subroutes = section.get_subroutes(section.frames[0])
+        self.assertEqual(len(subroutes[0]), 10)
+        self.assertIs(subroutes[1], None)
+
+    def test_final_zoomout_sections(self):
+        initial_extent = get_frame_extent(route, fixed_size=0.1, center_on="last")
+        final_extent = get_frame_extent(route)
+        zoomout, still = get_final_zoomout_sections([route], initial_extent, final_extent, add_data=True)
+        self.assertEqual(len(zoomout), cfg["movie_zoomout_seconds"] * cfg["frames_per_second"])
+        self.assertEqual(len(still), cfg["still_final_seconds"] * cfg["frames_per_second"])
+        self.assertEqual(zoomout.frames[0].extent, initial_extent)
+        self.assertEqual(still.static_extent, final_extent)
+        self.assertEqual(still.frames[-1].stops, [len(route)])
+
+    def test_frame_keys(self):
+        zoomout, still = get_final_zoomout_sections([route], get_frame_extent(route.prefix(10)),
+                                                    get_frame_extent(route), add_data=True)
+        self.assertEqual(len(set(still.get_frame_key(frame) for frame in still.frames)), 1)
+        self.assertEqual(len(set(zoomout.get_frame_key(frame) for frame in zoomout.frames)), len(zoomout))
+        section = MovieSection([route], show_global_time=True)
+        for current_time_in_seconds in [0., 10., 70.]:
+            section.add_frame([10], get_frame_extent(route), current_time_in_seconds)
+        keys = [section.get_frame_key(frame) for frame in section.frames]
+        self.assertEqual(keys[0], keys[1])
+        self.assertNotEqual(keys[1], keys[2])
+
+    def test_frame_route_without_time_data(self):
+        untimed_route = route[:]
+        untimed_route.time = np.zeros(len(untimed_route))
+        untimed_route.time_intervals = untimed_route.get_time_intervals()
+        frame_route, advancing = get_frame_route(untimed_route, 150.)
+        self.assertLess(len(frame_route), len(route))
+        self.assertEqual(np.all(advancing), True)
+        self.assertAlmostEqual(np.sum(frame_route.length_segments), frame_route.length[-1] - frame_route.length[0])
+        self.assertEqual(np.all(frame_route.time_intervals == 0.), True)
+
+
+if __name__ == '__main__':
+    unittest.main()
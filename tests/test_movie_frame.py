@@ -1,4 +1,5 @@
 from map_tools.movie_frame import *
+from map_tools.hud import get_data_texts
 from typing import List
 import unittest
 
@@ -16,6 +17,56 @@ class TestMovieFrame(unittest.TestCase):
     def test_trail(self):
         trail = get_trail(route[0:20])
         self.assertEqual(isinstance(trail, LineCollection), True)
+        trail = get_trail(route.prefix(20))
+        self.assertEqual(isinstance(trail, LineCollection), True)
+        self.assertIs(get_trail_colormap(route.color), get_trail(route.prefix(30)).get_cmap())
+
+    def test_segments(self):
+        segments = get_segments(route.longitude, route.latitude)
+        self.assertEqual(segments.shape, (len(route) - 1, 2, 2))
+        self.assertEqual(segments[5, 1, 0], route.longitude[6])
+        self.assertEqual(segments[5, 0, 1], route.latitude[5])
+        self.assertEqual(np.shares_memory(segments, segments[10:20]), True)
+
+    def test_static_background(self):
+        writer = FakeWriter()
+        fig = plt.figure()
+        background = StaticBackground(fig, get_frame_extent(route), 50)
+        for i in [10, 20]:
+            plot_frame(route.prefix(i), None, plot_background_map=False, adjust_layout=False)
+            background.grab_frame(writer)
+        self.assertEqual(len(writer.frames), 2)
+        self.assertEqual(len(writer.frames[0]), len(writer.frames[1]))
+        self.assertNotEqual(writer.frames[0], writer.frames[1])
+        self.assertEqual(len(background.get_frame_artists()), 0)
+        plt.close(fig)
+
+    def test_frame_renderer(self):
+        writer = FakeWriter()
+        fig = plt.figure()
+        renderer = FrameRenderer(fig, [route, route2], 50, static_extent=get_frame_extent(route))
+        n_artists = len(renderer.axes.get_children())
+        for i in [10, 20]:
+            renderer.update([route.prefix(i), None], get_frame_extent(route))
+            renderer.grab_frame(writer)
+        self.assertEqual(len(writer.frames), 2)
+        self.assertNotEqual(writer.frames[0], writer.frames[1])
+        self.assertEqual(renderer.route_lines[1].get_visible(), False)
+        self.assertEqual(renderer.data_texts[0].get_text(), get_data_texts(
+            route.length[19], route.altitude[19], route.time[19], get_frame_speed(route.prefix(20), 120))[0])
+        self.assertLessEqual(len(renderer.axes.get_children()), n_artists + 1)  # plus the map image
+        with self.assertRaises(IOError):
+            renderer.update([route2.prefix(10), None], get_frame_extent(route))
+        plt.close(fig)
+
+
+class FakeWriter(object):
+    # collects the raw frames that would be piped to ffmpeg
+    def __init__(self) -> None:
+        self.frames = []
+
+    def write_frame(self, frame) -> None:
+        self.frames.append(bytes(frame))
 
 
 if __name__ == '__main__':
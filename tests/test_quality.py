@@ -0,0 +1,33 @@
+from map_tools.quality import *
+from map_tools.plotting import get_zoom_level, get_frame_extent
+from map_tools.route import Route
+import unittest
+
+route = Route("../route_files/Erding_Whirlpool.gpx")
+
+
+class TestQuality(unittest.TestCase):
+
+    def test_tiers(self):
+        self.assertEqual(get_frames_per_second(), cfg["frames_per_second"])
+        self.assertEqual(get_video_dpi(), cfg["video_dpi_resolution"])
+        final_zoom = get_zoom_level(0.1)
+        with rendering_quality("draft") as tier:
+            self.assertIs(get_quality_tier(), tier)
+            self.assertLess(get_frames_per_second(), cfg["frames_per_second"])
+            self.assertLess(get_video_dpi(), cfg["video_dpi_resolution"])
+            self.assertEqual(get_zoom_level(0.1), final_zoom + tier.zoom_level_offset)
+        self.assertEqual(get_quality_tier().name, "final")
+        with self.assertRaises(IOError):
+            QualityTier("best")
+
+    def test_render_times(self):
+        render_times.clear()
+        with rendering_quality("preview"):
+            with rendering_quality("preview"):
+                get_frame_extent(route)
+        self.assertEqual(render_times.counts, {"preview": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,9 +12,84 @@ class TestRouteOperations(unittest.TestCase):
 
     def test_route_joining(self):
         self.assertEqual(len(route + route2), len(route)+len(route2))
+        joined_route = route + route2
+        self.assertEqual(joined_route.length[-1], route.length[-1] + route2.length[-1])
+
+    def test_route_concatenation(self):
+        joined_route = concat_routes([route, route2, route])
+        self.assertEqual(len(joined_route), 2 * len(route) + len(route2))
+        self.assertAlmostEqual(joined_route.time[-1], 2 * route.time[-1] + route2.time[-1])
+        self.assertAlmostEqual(joined_route.elevation_gain[-1],
+                               2 * route.elevation_gain[-1] + route2.elevation_gain[-1])
+        self.assertEqual(np.array_equal(joined_route.time_intervals[1:], np.diff(joined_route.time)), True)
+        self.assertEqual(np.all(np.diff(joined_route.route_segment_id[joined_route.route_segment_id > 0]) >= 0), True)
+        self.assertEqual(joined_route.color, route.color)
+
+    def test_route_segments(self):
+        segment_route = Route()
+        segment_route.set_data(np.zeros((len(route_columns), 7)))
+        segment_route.speed = [20., 20., 0., 0., 15., 0., 30.]
+        self.assertEqual(list(segment_route.get_route_segments()), [1, 1, 0, 0, 2, 0, 3])
+
+    def test_lazy_columns(self):
+        lazy_route = Route("../route_files/Erding_Whirlpool.gpx", use_cache=False)
+        self.assertEqual(lazy_route.computed_columns[column_index["speed"]], False)
+        self.assertEqual(np.array_equal(lazy_route.route_segment_id, route.route_segment_id), True)
+        self.assertEqual(lazy_route.computed_columns[column_index["speed"]], True)
+
+    def test_resampling(self):
+        frame_times = np.arange(0., route.time[-1], 5.)
+        resampled_route, advancing = resample_route(route, frame_times, max_gap=np.inf)
+        self.assertEqual(len(resampled_route), len(frame_times))
+        self.assertEqual(np.allclose(resampled_route.time, frame_times), True)
+        interpolated_latitude = np.interp(frame_times, route.time, route.latitude)
+        self.assertEqual(np.allclose(resampled_route.latitude, interpolated_latitude), True)
+        self.assertEqual(len(advancing), len(frame_times))
+        gap_route = Route()
+        gap_route.set_data(np.zeros((len(route_columns), 3)))
+        gap_route.time = [0., 10., 1000.]
+        gap_route.latitude = [0., 1., 2.]
+        resampled_route, advancing = resample_route(gap_route, [5., 100., 200., 1000.], max_gap=60.)
+        self.assertEqual(list(resampled_route.latitude), [0.5, 1., 1., 2.])
+        self.assertEqual(list(advancing), [True, True, False, True])
+
+    def test_column_block(self):
+        self.assertEqual(route.data.shape, (len(route_columns), len(route)))
+        self.assertEqual(np.shares_memory(route.latitude, route.data), True)
+        single_precision_route = Route("../route_files/Erding_Whirlpool.gpx", precision="float32")
+        self.assertEqual(single_precision_route.latitude.dtype, np.float32)
+        self.assertAlmostEqual(single_precision_route.length[-1], route.length[-1], places=2)
 
     def test_subroute(self):
         self.assertEqual(route[0:10].full_route, route)
+        self.assertEqual(len(route[0:10].route_segment_id), 10)
+
+    def test_prefix_view(self):
+        view = route.prefix(10)
+        self.assertEqual(len(view), 10)
+        self.assertEqual(view.full_route, route)
+        self.assertEqual(np.shares_memory(view.speed, route.speed), True)
+        self.assertEqual(view.length[-1], route.length[9])
+        self.assertEqual(len(view.prefix(20)), 10)
+
+    def test_hud_statistics(self):
+        view = route.prefix(100)
+        moving = view.speed > cfg["minimum_moving_speed"]
+        self.assertAlmostEqual(get_moving_average_speed(view), np.mean(view.speed[moving]))
+        self.assertAlmostEqual(get_total_moving_time(view), np.sum(view.time_intervals[moving]))
+        self.assertAlmostEqual(get_rolling_speed(view, 20), np.mean(view.speed[80:-1]))
+        self.assertAlmostEqual(get_rolling_speed(route.prefix(5), 20), np.mean(route.speed[0:4]))
+        self.assertEqual(get_rolling_speed(route.prefix(1), 20), 0.)
+        subroute = route[50:150]
+        self.assertAlmostEqual(get_moving_average_speed(subroute.prefix(50)), get_moving_average_speed(route[50:100]))
+
+    def test_slice_keeps_parent_statistics(self):
+        parent = Route("../route_files/Erding_Whirlpool.gpx")
+        rolling_speed = get_rolling_speed(parent.prefix(560), 120)
+        moving_time = get_total_moving_time(parent.prefix(800))
+        parent[500:1000].compute_all_columns()
+        self.assertEqual(get_rolling_speed(parent.prefix(560), 120), rolling_speed)
+        self.assertEqual(get_total_moving_time(parent.prefix(800)), moving_time)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,54 @@
+from map_tools.route_cache import *
+from map_tools.route import Route, column_index
+import os
+import tempfile
+import unittest
+
+route_file = "../route_files/Erding_Whirlpool.gpx"
+
+
+class TestRouteCache(unittest.TestCase):
+
+    def test_cache_key(self):
+        self.assertEqual(get_cache_key(route_file), get_cache_key(route_file))
+        self.assertNotEqual(get_cache_key(route_file), get_cache_key(route_file, time_delay=60))
+        self.assertNotEqual(get_cache_key(route_file), get_cache_key(route_file, precision="float32"))
+
+    def test_cache_keeps_precision(self):
+        Route(route_file, precision="float32")
+        route = Route(route_file, precision="float64")
+        self.assertEqual(route.data.dtype, np.float64)
+        self.assertEqual(np.array_equal(route.latitude, Route(route_file, use_cache=False).latitude), True)
+
+    def test_cached_route_matches_parsed_route(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            route = Route(route_file, use_cache=False)
+            store_cached_route("test", route.get_arrays(), cache_dir=Path(cache_dir))
+            cached_route = Route()
+            cached_route.route_from_arrays(load_cached_route("test", cache_dir=Path(cache_dir)))
+            self.assertEqual(len(cached_route), len(route))
+            self.assertEqual(cached_route.computed_columns[column_index["speed"]], False)
+            self.assertEqual(np.array_equal(cached_route.speed, route.speed), True)
+            self.assertEqual(np.array_equal(cached_route.route_segment_id, route.route_segment_id), True)
+            self.assertEqual(cached_route.avg_timestep, route.avg_timestep)
+
+    def test_lru_eviction(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            arrays = {"latitude": np.zeros(100000)}
+            for i, key in enumerate(["old", "used", "new"]):
+                store_cached_route(key, arrays, cache_dir=Path(cache_dir), max_size_mb=10.)
+                os.utime(Path(cache_dir) / (key + ".npz"), (i, i))
+            load_cached_route("old", cache_dir=Path(cache_dir))
+            evict_cache(Path(cache_dir), max_size_mb=1.7)
+            self.assertEqual(sorted(f.stem for f in Path(cache_dir).glob("*.npz")), ["new", "old"])
+
+    def test_unwritable_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            not_a_directory = Path(cache_dir) / "file"
+            not_a_directory.write_text("")
+            store_cached_route("test", {"latitude": np.zeros(10)}, cache_dir=not_a_directory / "cache")
+            self.assertEqual(load_cached_route("test", cache_dir=not_a_directory / "cache"), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
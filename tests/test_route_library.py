@@ -0,0 +1,24 @@
+from map_tools.route_library import *
+from map_tools.plotting import get_frame_extent_multiple
+import unittest
+
+
+class TestRouteLibrary(unittest.TestCase):
+
+    def test_load_directory(self):
+        library = load_routes("../route_files", workers=2)
+        self.assertEqual(len(library), len(list(Path("../route_files").glob("*.gpx"))))
+        self.assertEqual(len(library.failures), 0)
+        self.assertEqual(isinstance(library[0], Route), True)
+        self.assertEqual(len(get_frame_extent_multiple(library)), 4)
+
+    def test_failures_are_reported(self):
+        library = RouteLibrary(["../route_files/Erding_Whirlpool.gpx", "../route_files/missing.gpx"], workers=1)
+        self.assertEqual(len(library), 1)
+        self.assertEqual(list(library.failures.keys()), ["../route_files/missing.gpx"])
+        self.assertEqual(set(library.load_times.keys()), {"../route_files/Erding_Whirlpool.gpx",
+                                                          "../route_files/missing.gpx"})
+
+
+if __name__ == '__main__':
+    unittest.main()
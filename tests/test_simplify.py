@@ -0,0 +1,38 @@
+from map_tools.simplify import *
+from map_tools.route import Route
+import unittest
+
+route = Route("../route_files/Erding_Whirlpool.gpx")
+
+
+class TestSimplification(unittest.TestCase):
+
+    def test_straight_line(self):
+        x = np.linspace(0., 1., 50)
+        self.assertEqual(list(simplify_polyline(x, 2 * x, 0.01)), [0, 49])
+
+    def test_corner_is_kept(self):
+        x = np.array([0., 1., 2., 2., 2.])
+        y = np.array([0., 0., 0., 1., 2.])
+        self.assertEqual(list(simplify_polyline(x, y, 0.1)), [0, 2, 4])
+
+    def test_tolerance(self):
+        x, y = to_mercator_deg(route.longitude, route.latitude)
+        tolerance = get_pixel_size_in_deg(12)
+        indices = simplify_polyline(x, y, tolerance)
+        self.assertLess(len(indices), len(route))
+        segment = np.clip(np.searchsorted(indices, np.arange(len(route)), side="right") - 1, 0, len(indices) - 2)
+        start, end = indices[segment], indices[segment + 1]
+        distance = get_segment_distance(x, y, x[start], y[start], x[end], y[end])
+        self.assertLessEqual(np.max(distance), tolerance)
+
+    def test_prefix_view(self):
+        full_indices = get_simplified_indices(route, 12)
+        self.assertEqual(route.simplification_cache[12] is full_indices, True)
+        indices = get_simplified_indices(route.prefix(500), 12)
+        self.assertEqual(indices[-1], 499)
+        self.assertEqual(np.all(np.diff(indices) > 0), True)
+
+
+if __name__ == '__main__':
+    unittest.main()
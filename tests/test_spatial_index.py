@@ -0,0 +1,45 @@
+from map_tools.spatial_index import *
+from map_tools.route import route_columns
+import unittest
+
+route = Route("../route_files/Garching_Seefeld.gpx")
+
+
+class TestSpatialIndex(unittest.TestCase):
+
+    def test_query_contains_points_in_extent(self):
+        grid = GridIndex(route.longitude, route.latitude)
+        extent = [11.3, 11.4, 47.9, 48.0]
+        inside = np.flatnonzero(
+            (route.longitude >= extent[0]) & (route.longitude <= extent[1])
+            & (route.latitude >= extent[2]) & (route.latitude <= extent[3])
+        )
+        candidates = grid.query(extent)
+        self.assertEqual(np.all(np.isin(inside, candidates)), True)
+        self.assertLess(len(candidates), len(route))
+        self.assertEqual(len(grid.query([0., 1., 0., 1.])), 0)
+
+    def test_visible_vertices(self):
+        view = route.prefix(3000)
+        extent = [view.longitude[-1] - 0.05, view.longitude[-1] + 0.05,
+                  view.latitude[-1] - 0.025, view.latitude[-1] + 0.025]
+        vertices = get_visible_vertices(view, extent)
+        self.assertLess(len(vertices), 3000)
+        self.assertEqual(np.max(vertices), 2999)
+        drawn = vertices[vertices >= 0]
+        self.assertEqual(np.all(np.diff(drawn) > 0), True)
+        self.assertEqual(len(get_visible_vertices(route, [0., 1., 0., 1.])), 0)
+
+    def test_segment_crossing_extent(self):
+        # the segment between points 10 and 11 crosses the extent, no point lies in it
+        line = Route()
+        line.set_data(np.zeros((len(route_columns), 22)))
+        line.longitude = np.concatenate((np.linspace(0., 0.1, 11), np.linspace(1., 1.1, 11)))
+        line.latitude = np.zeros(22)
+        vertices = get_visible_vertices(line, [0.5, 0.6, -0.1, 0.1])
+        self.assertEqual(list(vertices), [10, 11])
+        self.assertEqual(list(get_visible_vertices(line.prefix(5), [0.5, 0.6, -0.1, 0.1])), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+from map_tools.tile_cache import *
+import unittest
+
+
+class TestTileCache(unittest.TestCase):
+
+    def test_hits_and_misses(self):
+        cache = TileCache(max_size_mb=1.)
+        self.assertEqual(cache.get((0, 0, 1)), None)
+        cache.put((0, 0, 1), np.zeros((256, 256, 3), dtype=np.uint8), 256 * 256 * 3)
+        self.assertEqual(cache.get((0, 0, 1)).shape, (256, 256, 3))
+        self.assertEqual(cache.hits["tile"], 1)
+        self.assertEqual(cache.misses["tile"], 1)
+
+    def test_lru_eviction(self):
+        cache = TileCache(max_size_mb=0.5)
+        for key in ["old", "used", "new"]:
+            cache.put(key, key, 200000)
+            cache.get("used")
+        self.assertEqual(cache.get("old"), None)
+        self.assertEqual(cache.get("used"), "used")
+        self.assertEqual(cache.get("new"), "new")
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.size_bytes, 400000)
+
+    def test_oversized_entry(self):
+        cache = TileCache(max_size_mb=0.1)
+        cache.put("large", "large", 200000)
+        self.assertEqual(len(cache), 0)
+
+    def test_shared_tile_source(self):
+        self.assertIs(get_tile_source(), get_tile_source())
+        self.assertIs(get_tile_source().memory_cache, tile_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+from map_tools.tile_store import *
+from map_tools.tile_prefetch import get_corridor_tiles, get_route_zoom_levels, prefetch_route
+from map_tools.tile_cache import OfflineOSM, TileCache
+from map_tools.route import Route
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from PIL import Image
+import io
+import tempfile
+import threading
+import unittest
+
+route = Route("../route_files/Erding_Whirlpool.gpx")
+
+
+class TileHandler(BaseHTTPRequestHandler):
+    # local stand-in for the OSM tile server, every tile is filled with a color derived from its zoom level
+    def do_GET(self) -> None:
+        z = int(self.path.split("/")[1])
+        data = io.BytesIO()
+        Image.new("RGB", (256, 256), (z, 0, 0)).save(data, format="png")
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.end_headers()
+        self.wfile.write(data.getvalue())
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class TestTileStore(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = HTTPServer(("127.0.0.1", 0), TileHandler)
+        cls.url = "http://127.0.0.1:%i/{z}/{x}/{y}.png" % cls.server.server_port
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def test_tile_indices(self):
+        self.assertEqual(get_tile_x(11.5, 10), 544)
+        self.assertEqual(get_tile_y(48.1, 10), 355)
+        self.assertEqual(get_tile_x(180., 3), 7)
+
+    def test_store(self):
+        with tempfile.TemporaryDirectory() as store_dir:
+            store = TileStore(Path(store_dir) / "tiles.mbtiles")
+            store.put((544, 355, 10), b"tile")
+            self.assertEqual(store.get((544, 355, 10)), b"tile")
+            self.assertEqual((544, 356, 10) in store, False)
+            self.assertEqual(len(store), 1)
+            store.close()
+
+    def test_corridor_tiles(self):
+        zoom_levels = get_route_zoom_levels(route, 0.1)
+        self.assertEqual(zoom_levels, sorted(zoom_levels))
+        tiles = get_corridor_tiles(route, zoom_levels[-1])
+        self.assertIn((int(get_tile_x(route.longitude[0], zoom_levels[-1])),
+                       int(get_tile_y(route.latitude[0], zoom_levels[-1])), zoom_levels[-1]), tiles)
+        self.assertLess(len(get_corridor_tiles(route, zoom_levels[0])), len(tiles))
+
+    def test_prefetch_and_offline_source(self):
+        with tempfile.TemporaryDirectory() as store_dir:
+            store = TileStore(Path(store_dir) / "tiles.mbtiles")
+            tiles = get_corridor_tiles(route, 12)
+            self.assertEqual(prefetch_route(route, [12], store, url=self.url), len(tiles))
+            self.assertEqual(prefetch_route(route, [12], store, url=self.url), 0)
+            self.assertEqual(len(store), len(tiles))
+            offline_source = OfflineOSM(store, memory_cache=TileCache())
+            image = offline_source.get_image(tiles[0])[0]
+            self.assertEqual(tuple(image[0, 0]), (12, 0, 0))
+            image = offline_source.get_image((0, 0, 1))[0]
+            self.assertEqual(tuple(image[0, 0]), (255, 255, 255))
+            self.assertEqual(offline_source.missing_tiles, {(0, 0, 1)})
+            store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()